@@ -16,7 +16,7 @@ import pandas as pd
 import numpy as np
 import networkx as nx
 
-from pangenome import generate_annotations, breakdown_feature_name
+from pangenomix.pangenome import generate_annotations, breakdown_feature_name
 
 # Manually selected AROs corresponding to drug classes and superclasses
 DRUG_CLASS_AROS = [
@@ -70,7 +70,7 @@ def add_probable_hits(df_aro, df_prob, organism, print_additions=False):
     for row in dfp.itertuples(name=None):
         feature = row[1]; drug = row[drug_pos+1]
         related_aros = str(row[aro_pos+1]); annot = row[annot_pos+1] 
-        if (';' in related_aros) or (unicode(related_aros).isnumeric()): # matched multiple or single ARO
+        if (';' in related_aros) or (related_aros.isnumeric()): # matched multiple or single ARO
             aro_label = '*' + related_aros
         else: # did not match CARD hit, inferred from annotation
             aro_label = 'Inferred'
@@ -269,7 +269,7 @@ def run_rgi(fasta_in, rgi_out, rgi_args={'-a':'DIAMOND', '-n':1},
         with open(fasta_in, 'r') as f_in:
             with open(fasta_tmp, 'w+') as f_out:
                 for line in f_in:
-                    output = line.split()[0] if line[0] == '>' else line
+                    output = line.split()[0] if line[:1] == '>' else line
                     f_out.write(output.strip() + '\n')
         fasta = fasta_tmp
     else: # use original file
@@ -191,7 +191,7 @@ def validate_mic_sir_mappings(mic_ref_calls, mic_ranges):
         for mic in mic_ref_calls[case]:
             calls = mic_ref_calls[case][mic]
             if len(calls) > 1:
-                print 'AMBIGUOUS MIC-SIR:\t', '\t'.join(case), '\t', mic, mic_ref_calls[case][mic]
+                print('AMBIGUOUS MIC-SIR:\t', '\t'.join(case), '\t', mic, mic_ref_calls[case][mic])
                 
     ''' Checking for Inconsistent MICs: S > I, S > R, or I > R (also report combination therapies) '''
     for case in sorted(mic_ref_calls.keys()):
@@ -206,17 +206,17 @@ def validate_mic_sir_mappings(mic_ref_calls, mic_ranges):
             if has_s and has_i: # check susceptible < intermediate
                 s_vs_i = max(mic_ranges[case]['susceptible']) < min(mic_ranges[case]['intermediate'])
                 if not s_vs_i:
-                    print 'INCONSISTENT S vs I:\t', '\t'.join(case), '\t', mic_ranges[case]
+                    print('INCONSISTENT S vs I:\t', '\t'.join(case), '\t', mic_ranges[case])
             if has_s and has_r: # check susceptible < resistant
                 s_vs_r = max(mic_ranges[case]['susceptible']) < min(mic_ranges[case]['resistant'])
                 if not s_vs_r:
-                    print 'INCONSISTENT S vs R:\t', '\t'.join(case), '\t', mic_ranges[case]
+                    print('INCONSISTENT S vs R:\t', '\t'.join(case), '\t', mic_ranges[case])
             if has_i and has_r: # check intermediate < resistant
                 i_vs_r = max(mic_ranges[case]['intermediate']) < min(mic_ranges[case]['resistant'])
                 if not i_vs_r:
-                    print 'INCONSISTENT I vs R:\t', '\t'.join(case), '\t', mic_ranges[case]
+                    print('INCONSISTENT I vs R:\t', '\t'.join(case), '\t', mic_ranges[case])
         else:
-            print 'COMBINATION THERAPY:\t', '\t'.join(case), '\t', mic_ranges[case]
+            print('COMBINATION THERAPY:\t', '\t'.join(case), '\t', mic_ranges[case])
 
 
 def extract_mic_calls(org_to_gids, df_amr, min_entries=100):
@@ -329,7 +329,7 @@ def extract_primary_stnds(org_to_gids, df_amr, min_entries=100, stnd_col='testin
             stnd_counts = df_drug_amr[stnd_col].value_counts(dropna=False)
             top_stnd = stnd_counts.index[0]
             top_stnd = stnd_counts.index[1] if pd.isnull(top_stnd) and stnd_counts.shape[0] > 1 else top_stnd
-            other_stnds = filter(lambda x: pd.notnull(x) and x!= top_stnd, stnd_counts.index.tolist())
+            other_stnds = list(filter(lambda x: pd.notnull(x) and x!= top_stnd, stnd_counts.index.tolist()))
             n_top_stnd = stnd_counts[top_stnd]
             n_missing = stnd_counts.loc[np.nan] if np.nan in stnd_counts.index else 0
             n_other_stnd = df_drug_amr.shape[0] - n_top_stnd*(pd.notnull(top_stnd)) - n_missing
@@ -55,7 +55,7 @@ def evaluate_model(base_clf, lsdf_case, case_block_defs, df_amr_org_drug,
         df_weights = __extract_weights_from_bagging_ensemble__(clf, lsdf_case.index)
         print('\tSelected blocks:', df_weights.shape)
         df_original_weights = {}; amr_blocks = set()
-        for block, weight in df_weights.iteritems():
+        for block, weight in df_weights.items():
             block_id = int(block[1:])
             for feature in case_block_defs[block_id]:
                 df_original_weights[feature] = weight
@@ -156,8 +156,9 @@ def __extract_weights_from_bagging_ensemble__(clf, feature_labels):
         df_weights_full['CLF' + str(i)] = df
     df_weights_full = pd.DataFrame.from_dict(df_weights_full)
     df_weights_full.index = df_weights_full.index.map(lambda x: feature_labels[x])
-    df_weights = pd.Series(data=np.nanmean(df_weights_full, axis=1), index=df_weights_full.index)
-    df_weights = df_weights[df_weights != 0.0] # reduced to selected features
+    mean_weights = np.nanmean(df_weights_full.values, axis=1)
+    selected = mean_weights != 0.0 # reduce to selected features before building Series
+    df_weights = pd.Series(data=mean_weights[selected], index=df_weights_full.index[selected])
     return df_weights   
 
         
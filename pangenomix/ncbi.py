@@ -9,6 +9,8 @@ Created on Mon Sep 13 21:16:50 2021
 import time, os, ftplib, shutil
 import subprocess as sp
 
+from pangenomix.pangenome import __stream_stdout__
+
 def run_prodigal_parallel(fna_paths, processes=4, poll_time=0.5,
     prodigal_args=['-c', '-m', '-g', '11', '-p', 'single', '-q'],
     prodigal_path='prodigal', footer=''):
@@ -48,7 +50,7 @@ def run_prodigal_parallel(fna_paths, processes=4, poll_time=0.5,
                         '-a', output_faa, '-f', 'gff']
                 args += prodigal_args
                 assembly_count += 1
-                print assembly_count, args
+                print(assembly_count, args)
                 proc = sp.Popen(args)
                 active_processes.append(proc)
         
@@ -79,9 +81,9 @@ def download_ncbi_assemblies(accession_ids, output_dir, batch_size=100,
         os.mkdir(output_dir)
     download_ncbi_assemblies_using_datasets(
         accession_ids, output_dir, batch_size, datasets_prog)
-    downloaded_accs = filter(lambda x: x in accession_ids, os.listdir(output_dir))
-    print 'Downloaded', len(downloaded_accs), 'genomes of', len(accession_ids), 
-    print 'with NCBI datasets. Downloading rest with FTP...'
+    downloaded_accs = list(filter(lambda x: x in accession_ids, os.listdir(output_dir)))
+    print('Downloaded', len(downloaded_accs), 'genomes of', len(accession_ids), end=' ')
+    print('with NCBI datasets. Downloading rest with FTP...')
     download_ncbi_assemblies_using_ftp(
         accession_ids, output_dir, ftp_url)
 
@@ -110,8 +112,8 @@ def download_ncbi_assemblies_using_datasets(
 
     ''' Write accession IDs to temporary file '''
     target_accs, existing_accs = __filter_existing_assemblies__(accession_ids, outdir)
-    print 'Downloading', len(target_accs), 'genomes',
-    print '(skipping', len(existing_accs), 'genomes, already downloaded)'
+    print('Downloading', len(target_accs), 'genomes', end=' ')
+    print('(skipping', len(existing_accs), 'genomes, already downloaded)')
 
     ''' Run datasets commands '''
     if len(target_accs) > 0:
@@ -130,25 +132,25 @@ def download_ncbi_assemblies_using_datasets(
         
             ''' Run NCBI datasets ''' 
             time_start = time.time()
-            print 'Downloading genomes', batch_start+1, '...', batch_end
+            print('Downloading genomes', batch_start+1, '...', batch_end)
             args = [datasets_prog, 'download', 'genome', 'accession', '--inputfile', temp_accs_path, 
                     '--exclude-genomic-cds', '--exclude-gff3', '--exclude-protein', '--exclude-rna',
                     '--no-progressbar']
-            print ' '.join(args)
+            print(' '.join(args))
             try:
-                print sp.check_output(args, cwd=tmpdir)
-                print 'Downloaded in', round(time.time() - time_start, 3), 'seconds'
+                print(sp.check_output(args, cwd=tmpdir))
+                print('Downloaded in', round(time.time() - time_start, 3), 'seconds')
             except:
-                print 'NCBI datasets download failed'
+                print('NCBI datasets download failed')
 
             os.remove(temp_accs_path)
             if os.path.exists(tmpdir + 'ncbi_dataset.zip'):
                 ''' Unzip payload '''
-                print 'Decompressing download...'
+                print('Decompressing download...')
                 sp.call(['unzip', 'ncbi_dataset.zip'], cwd=tmpdir)
 
                 ''' Move and rename genomes to target directory '''
-                print 'Processing downloaded files...'
+                print('Processing downloaded files...')
                 for acc in batch_accs:
                     acc_dir = tmpdir + 'ncbi_dataset/data/' + acc + '/'
                     acc_dir_new = outdir + acc + '/'
@@ -156,15 +158,15 @@ def download_ncbi_assemblies_using_datasets(
                         if len(os.listdir(acc_dir_new)) == 0:
                             os.rmdir(acc_dir_new)
                         else:
-                            print 'ERROR: Output directory exists and is non-empty, skipping', acc
-                            print acc_dir_new
-                            print os.listdir(acc_dir_new)
+                            print('ERROR: Output directory exists and is non-empty, skipping', acc)
+                            print(acc_dir_new)
+                            print(os.listdir(acc_dir_new))
                     if os.path.isdir(acc_dir) and (not os.path.exists(acc_dir_new)):
                         shutil.move(acc_dir, outdir)
                         if os.path.exists(acc_dir_new + 'sequence_report.jsonl'): # remove sequence report
                             os.remove(acc_dir_new + 'sequence_report.jsonl')
                         fna_files = filter(lambda x: x.endswith('.fna'), os.listdir(acc_dir_new))
-                        fna_paths = map(lambda x: acc_dir_new + x, fna_files)
+                        fna_paths = list(map(lambda x: acc_dir_new + x, fna_files))
                         fna_out = acc_dir_new + acc + '.fna'
                         if len(fna_paths) > 1: # multiple FNAs, concatenate
                             with open(fna_out,'wb') as f_out:
@@ -175,7 +177,7 @@ def download_ncbi_assemblies_using_datasets(
                         elif len(fna_paths) == 1: # single FNA, rename
                             os.rename(fna_paths[0], fna_out)
                         else: # no FNAs, print warning
-                            print 'No FNAs downloaded:', acc
+                            print('No FNAs downloaded:', acc)
 
                 ''' Remove temporary files '''
                 shutil.rmtree(tmpdir)
@@ -183,7 +185,7 @@ def download_ncbi_assemblies_using_datasets(
 
         os.rmdir(tmpdir)
     else:
-        print 'Nothing to download, aborting'
+        print('Nothing to download, aborting')
 
         
 def download_ncbi_assemblies_using_ftp(accession_ids, output_dir, ftp_url='ftp.ncbi.nlm.nih.gov'):
@@ -205,8 +207,8 @@ def download_ncbi_assemblies_using_ftp(accession_ids, output_dir, ftp_url='ftp.n
     outdir = output_dir + '/' if output_dir[-1] != '/' else output_dir
     target_accs, existing_accs = __filter_existing_assemblies__(accession_ids, outdir)
     
-    print 'Downloading', len(target_accs), 'genomes',
-    print '(skipping', len(existing_accs), 'genomes, already downloaded)'
+    print('Downloading', len(target_accs), 'genomes', end=' ')
+    print('(skipping', len(existing_accs), 'genomes, already downloaded)')
     if len(target_accs) > 0:
         ftp = ftplib.FTP(ftp_url)
         ftp.login()
@@ -222,34 +224,35 @@ def download_ncbi_assemblies_using_ftp(accession_ids, output_dir, ftp_url='ftp.n
             ''' Identify specific assembly of interest '''
             try:
                 ftp.cwd(sub_path)
-                assembly = filter(lambda x: x.startswith(acc), ftp.nlst())
+                assembly = list(filter(lambda x: x.startswith(acc), ftp.nlst()))
             except: # first fail
-                print '\tWARN: Identifying assembly failed, retrying for', acc
+                print('\tWARN: Identifying assembly failed, retrying for', acc)
                 try: 
                     time.sleep(1.0)
                     ftp.cwd(sub_path)
-                    assembly = filter(lambda x: x.startswith(acc), ftp.nlst())
+                    assembly = list(filter(lambda x: x.startswith(acc), ftp.nlst()))
                 except: # second fail
-                    print '\tERROR: Failed to identify assembly twice, skipping', acc
+                    print('\tERROR: Failed to identify assembly twice, skipping', acc)
                     assembly = []
 
             ''' Download the specific assembly '''
             if len(assembly) == 1:
                 assembly_name = assembly[0]
                 fna_path = assembly_name + '/' + assembly_name + '_genomic.fna.gz'
-                print a+1, acc, '\n', ftp_url + sub_path + fna_path
+                print(a+1, acc, '\n', ftp_url + sub_path + fna_path)
                 try:
-                    ftp.retrbinary('RETR ' + fna_path, open(fna_out, 'w+').write)
+                    with open(fna_out, 'wb') as f_fna: # gzipped bytes, closed before decompressing
+                        ftp.retrbinary('RETR ' + fna_path, f_fna.write)
                     sp.call(['gzip', '-d', fna_out])
                 except:
-                    print '\tERROR: Failed to download for', acc
+                    print('\tERROR: Failed to download for', acc)
                     for f in [fna_out, fna_out_final]: # clean up potentially failed downloads
                         if os.path.exists(f):
                             os.remove(f)
             elif len(assembly) == 0:
-                print a+1, 'WARN: No assemblies found, skipping:',  acc
+                print(a+1, 'WARN: No assemblies found, skipping:',  acc)
             elif len(assembly) > 1:
-                print a+1, 'WARN: Multiple assemblies found, skipping:', acc
+                print(a+1, 'WARN: Multiple assemblies found, skipping:', acc)
         ftp.close()
         
 def bidirectional_blast(seq1_fasta, seq2_fasta, report_dir, 
@@ -328,23 +331,14 @@ def bidirectional_blast(seq1_fasta, seq2_fasta, report_dir,
     reverse_args = [blasttype, '-db', db1_name, '-query', seq2_fasta,
                     '-out', reverse_report, '-outfmt', '6'] + extra_blast_args
     print(forward_args)
-    for line in __stream_stdout__(' '.join(forward_args)):
+    for line in __stream_stdout__(forward_args):
         print(line)
     print(reverse_args)
-    for line in __stream_stdout__(' '.join(reverse_args)):
+    for line in __stream_stdout__(reverse_args):
         print(line)
     return forward_report, reverse_report
 
 
-def __stream_stdout__(command):
-    ''' Hopefully Jupyter-safe method for streaming process stdout '''
-    process = sp.Popen(command, stdout=sp.PIPE, shell=True)
-    while True:
-        line = process.stdout.readline().decode('utf-8')
-        if not line:
-            break
-        yield line.rstrip()
-        
 def __filter_existing_assemblies__(accession_ids, outdir):
     ''' Separates accession IDs into ones missing/already downloaded  '''
     target_accs = []; existing_accs = []
@@ -19,10 +19,11 @@ Pan-genome feature nomenclature:
 """
 
 from __future__ import print_function
-import os, shutil, urllib
+import os, urllib.parse
 import subprocess as sp
+import multiprocessing as mp
 import hashlib 
-import collections
+import collections, contextlib, functools, itertools, re
 
 import pandas as pd
 import numpy as np
@@ -30,20 +31,27 @@ import scipy.sparse
 import pangenomix.sparse_utils
 
 LOG_RATE = 10 # used in build_genetic_feature_tables(), interval to report progress
+VALIDATION_WORKER_LOOKUPS = {} # used in validate_table_against_fasta(), per-process lookups for parallel jobs
+PICKLE_COMPRESSION = {'method':'gzip', 'compresslevel':1} # for legacy PICKLE.GZ tables, fast gzip level
 CLUSTER_TYPES = {'cds':'C', 'noncoding':'T'}
 VARIANT_TYPES = {'allele':'A', 'upstream':'U', 'downstream':'D'}
 CLUSTER_TYPES_REV = {v:k for k,v in CLUSTER_TYPES.items()}
 VARIANT_TYPES_REV = {v:k for k,v in VARIANT_TYPES.items()}
+FEATURE_NAME_PATTERN = re.compile( # for breakdown_feature_name(), <name>_<cluster type><#>[<variant type><#>]
+    r'^(?:(.*)_)?(.)(\d+)(?:([' + ''.join(VARIANT_TYPES_REV) + r'])(\d+))?$', re.DOTALL)
 DNA_COMPLEMENT = {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A', 
               'W': 'W', 'S': 'S', 'R': 'Y', 'Y': 'R', 
               'M': 'K', 'K': 'M', 'N': 'N'}
 for bp in list(DNA_COMPLEMENT.keys()):
     DNA_COMPLEMENT[bp.lower()] = DNA_COMPLEMENT[bp].lower()
+DNA_COMPLEMENT_TABLE = str.maketrans(DNA_COMPLEMENT) # for reverse_complement(), via str.translate
+DNA_COMPLEMENT_BYTES_TABLE = bytes.maketrans( # same as above, for bytes sequences
+    ''.join(DNA_COMPLEMENT.keys()).encode('utf-8'), ''.join(DNA_COMPLEMENT.values()).encode('utf-8'))
 
     
 def build_cds_pangenome(genome_faa_paths, output_dir, name='Test', 
-                        cdhit_args={'-n':5, '-c':0.8}, fastasort_path=None, 
-                        output_format='lsdf'):
+                        cdhit_args={'-n':5, '-c':0.8, '-T':0}, fastasort_path=None, 
+                        output_format='lsdf', n_jobs=1):
     ''' 
     Constructs a pan-genome based on protein sequences with the following steps:
     1) Merge FAA files for genomes of interest into a non-redundant list
@@ -78,7 +86,7 @@ def build_cds_pangenome(genome_faa_paths, output_dir, name='Test',
         Header to prepend to all output files and allele names (default 'Test')
     cdhit_args : dict
         Alignment arguments to pass CD-Hit, other than -i, -o, and -d
-        (default {'-n':5, '-c':0.8})
+        (default {'-n':5, '-c':0.8, '-T':0})
     fastasort_path : str
         Path to Exonerate's fastasort binary, optionally for sorting
         final FAA files (default None)
@@ -87,6 +95,9 @@ def build_cds_pangenome(genome_faa_paths, output_dir, name='Test',
         scipy.sparse matrices with index labels) and saves to npz.
         If 'sparr', returns the SparseArray DataFrame legacy format from 
         Python 2 and saves to pickle (default 'lsdf').
+    n_jobs : int
+        Number of parallel jobs for scanning genome FAA files when
+        consolidating sequences and building gene/allele tables (default 1)
         
     Returns 
     -------
@@ -101,15 +112,12 @@ def build_cds_pangenome(genome_faa_paths, output_dir, name='Test',
     
     ''' Merge FAAs into one file with non-redundant sequences '''
     print('Identifying non-redundant CDS sequences...')
-    output_nr_faa = output_dir + '/' + name + '_nr.faa' # final non-redundant FAA files
-    output_shared_headers = output_dir + '/' + name + '_redundant_headers.tsv' # records headers that have the same sequence
-    output_missing_headers = output_dir + '/' + name + '_missing_headers.txt' # records headers without any seqeunce
-    output_nr_faa = output_nr_faa.replace('//','/')
-    output_shared_headers = output_shared_headers.replace('//','/')
-    output_missing_headers = output_missing_headers.replace('//','/')
+    output_nr_faa = os.path.join(output_dir, name + '_nr.faa') # final non-redundant FAA files
+    output_shared_headers = os.path.join(output_dir, name + '_redundant_headers.tsv') # records headers that have the same sequence
+    output_missing_headers = os.path.join(output_dir, name + '_missing_headers.txt') # records headers without any seqeunce
     non_redundant_seq_hashes, missing_headers = consolidate_seqs(
-        genome_faa_paths, output_nr_faa, output_shared_headers, output_missing_headers)
-    # maps sequence hash to headers of that sequence, in order observed
+        genome_faa_paths, output_nr_faa, output_shared_headers, output_missing_headers, n_jobs=n_jobs)
+    # maps sequence hash to first header of that sequence, in order observed
     
     ''' Apply CD-Hit to non-redundant CDS sequences '''
     output_nr_faa_copy = output_nr_faa + '.cdhit' # temporary FAA copy generated by CD-Hit
@@ -118,8 +126,7 @@ def build_cds_pangenome(genome_faa_paths, output_dir, name='Test',
     os.remove(output_nr_faa_copy) # delete CD-hit copied sequences
     
     ''' Extract genes and alleles, rename unique sequences as <name>_C#A# '''
-    output_allele_names = output_dir + '/' + name + '_allele_names.tsv' # allele names vs non-redundant headers
-    output_allele_names = output_allele_names.replace('//','/')
+    output_allele_names = os.path.join(output_dir, name + '_allele_names.tsv') # allele names vs non-redundant headers
     header_to_allele = rename_genes_and_alleles(
         output_nr_clstr, output_nr_faa, output_nr_faa, 
         output_allele_names, name=name, cluster_type='cds',
@@ -130,13 +137,11 @@ def build_cds_pangenome(genome_faa_paths, output_dir, name='Test',
     ''' Process gene/allele membership into binary tables '''    
     df_alleles, df_genes = build_genetic_feature_tables(
         output_nr_clstr, genome_faa_paths, name, cluster_type='cds', 
-        output_format=output_format, header_to_allele=header_to_allele)
+        output_format=output_format, header_to_allele=header_to_allele, n_jobs=n_jobs)
     
     ''' Saving gene and allele tables '''
-    output_allele_table = output_dir + '/' + name + '_strain_by_allele'
-    output_gene_table = output_dir + '/' + name + '_strain_by_gene'
-    output_allele_table = output_allele_table.replace('//','/')
-    output_gene_table = output_gene_table.replace('//','/')
+    output_allele_table = os.path.join(output_dir, name + '_strain_by_allele')
+    output_gene_table = os.path.join(output_dir, name + '_strain_by_gene')
     if output_format == 'lsdf':
         ''' Saving to NPZ + NPZ.TXT (see sparse_utils.LightSparseDataFrame) '''
         output_allele_npz = output_allele_table + '.npz'
@@ -150,16 +155,17 @@ def build_cds_pangenome(genome_faa_paths, output_dir, name='Test',
         output_allele_pickle = output_allele_table + '.pickle.gz'
         output_gene_pickle = output_gene_table + '.pickle.gz'
         print('Saving', output_allele_pickle, '...')
-        df_alleles.to_pickle(output_allele_pickle)
+        df_alleles.to_pickle(output_allele_pickle, compression=PICKLE_COMPRESSION)
         print('Saving', output_gene_pickle, '...')
-        df_genes.to_pickle(output_gene_pickle)
+        df_genes.to_pickle(output_gene_pickle, compression=PICKLE_COMPRESSION)
     return df_alleles, df_genes
 
 
 def build_noncoding_pangenome(genome_data, output_dir, name='Test', flanking=(0,0),
                               allowed_features=['transcript', 'tRNA', 'rRNA', 'misc_binding'],
-                              cdhit_args={'-n':5, '-c':0.8}, fastasort_path=None, 
-                              output_format='lsdf', fna_output_footer='', overwrite_extract=False):
+                              cdhit_args={'-n':5, '-c':0.8, '-T':0}, fastasort_path=None, 
+                              output_format='lsdf', fna_output_footer='', overwrite_extract=False,
+                              n_jobs=1):
     ''' 
     Constructs a pan-genome based on noncoding sequences with the following steps:
     1) Extract non-coding transcripts (optionally with flanking NTs) based on FNA/GFF pairs
@@ -201,7 +207,7 @@ def build_noncoding_pangenome(genome_data, output_dir, name='Test', flanking=(0,
         (default ['transcript', 'tRNA', 'rRNA', 'misc_binding'])
     cdhit_args : dict
         Alignment arguments to pass CD-HIT-EST, other than -i, -o, and -d
-        (default {'-n':5, '-c':0.8})
+        (default {'-n':5, '-c':0.8, '-T':0})
     fastasort_path : str
         Path to Exonerate's fastasort binary, optionally for sorting
         final FAA files (default None)
@@ -220,6 +226,10 @@ def build_noncoding_pangenome(genome_data, output_dir, name='Test', flanking=(0,
     overwrite_extract : bool
         If true, will re-extract noncoding regions even if the target file
         already exists (default False)
+    n_jobs : int
+        Number of parallel jobs for extracting noncoding sequences, and for 
+        scanning noncoding FNA files when consolidating sequences and 
+        building gene/allele tables (default 1)
         
     Returns 
     -------       
@@ -235,15 +245,15 @@ def build_noncoding_pangenome(genome_data, output_dir, name='Test', flanking=(0,
     ''' Extract non-coding sequences from all genomes '''
     print('Extracting non-coding sequences...')
     genome_noncoding_paths = []
+    extract_jobs = [] # arguments for extract_noncoding(), for genomes to be (re-)extracted
     for i, gff_fna in enumerate(genome_data):
         ''' Prepare output path '''
         genome_gff, genome_fna = gff_fna
         genome = __get_genome_from_filename__(genome_gff)
-        genome_dir = '/'.join(genome_gff.split('/')[:-1]) + '/' if '/' in genome_gff else ''
-        genome_nc_dir = genome_dir + 'derived/' # output noncoding sequences here
+        genome_nc_dir = os.path.join(os.path.dirname(genome_gff), 'derived') # output noncoding sequences here
         if not os.path.exists(genome_nc_dir):
             os.mkdir(genome_nc_dir)
-        genome_nc = genome_nc_dir + genome + '_noncoding' + fna_output_footer + '.fna'
+        genome_nc = os.path.join(genome_nc_dir, genome + '_noncoding' + fna_output_footer + '.fna')
         genome_noncoding_paths.append(genome_nc)
             
         ''' Extract non-coding sequences '''
@@ -251,23 +261,25 @@ def build_noncoding_pangenome(genome_data, output_dir, name='Test', flanking=(0,
             print(i+1, 'Using pre-existing noncoding sequences for', genome)
         else:
             print(i+1, 'Extracting noncoding regions for', genome)
-            extract_noncoding(genome_gff, genome_fna, genome_nc, 
-                flanking=flanking, allowed_features=allowed_features)
+            extract_jobs.append((genome_gff, genome_fna, genome_nc, flanking, allowed_features))
+    if n_jobs > 1 and len(extract_jobs) > 1: # extract genomes in parallel
+        with mp.Pool(processes=n_jobs) as p:
+            p.starmap(extract_noncoding, extract_jobs)
+    else: # single job
+        for extract_job in extract_jobs:
+            extract_noncoding(*extract_job)
         
     ''' Reduce to non-redundant sequence set '''
     print('Identifying non-redundant non-coding sequences...')
-    output_nr_fna = output_dir + '/' + name + '_noncoding_nr.fna' # final non-redundant FNA files
-    output_shared_headers = output_dir + '/' + name + '_noncoding_redundant_headers.tsv' 
+    output_nr_fna = os.path.join(output_dir, name + '_noncoding_nr.fna') # final non-redundant FNA files
+    output_shared_headers = os.path.join(output_dir, name + '_noncoding_redundant_headers.tsv') 
         # records headers that have the same sequence
-    output_missing_headers = output_dir + '/' + name + '_noncoding_missing_headers.txt' 
+    output_missing_headers = os.path.join(output_dir, name + '_noncoding_missing_headers.txt') 
         # records headers without any seqeunce
-    output_nr_fna = output_nr_fna.replace('//','/')
-    output_shared_headers = output_shared_headers.replace('//','/')
-    output_missing_headers = output_missing_headers.replace('//','/')
     nr_seq_hashes, missing_headers = consolidate_seqs(
         genome_noncoding_paths, output_nr_fna, 
-        output_shared_headers, output_missing_headers)
-    # maps sequence hash to headers of that sequence, in order observed
+        output_shared_headers, output_missing_headers, n_jobs=n_jobs)
+    # maps sequence hash to first header of that sequence, in order observed
     
     ''' Apply CD-Hit to non-redundant non-coding sequences '''
     output_nr_fna_copy = output_nr_fna + '.cdhit' # temporary FNA copy generated by CD-HIT-EST
@@ -276,8 +288,7 @@ def build_noncoding_pangenome(genome_data, output_dir, name='Test', flanking=(0,
     os.remove(output_nr_fna_copy) # delete CD-HIT-EST copied sequences
     
     ''' Extract genes and alleles, rename unique sequences as <name>_T#A# '''
-    output_allele_names = output_dir + '/' + name + '_noncoding_allele_names.tsv' # allele names vs non-redundant headers
-    output_allele_names = output_allele_names.replace('//','/')
+    output_allele_names = os.path.join(output_dir, name + '_noncoding_allele_names.tsv') # allele names vs non-redundant headers
     header_to_allele = rename_genes_and_alleles(
         output_nr_clstr, output_nr_fna, output_nr_fna, 
         output_allele_names, name=name, cluster_type='noncoding',
@@ -288,15 +299,13 @@ def build_noncoding_pangenome(genome_data, output_dir, name='Test', flanking=(0,
     ''' Process gene/allele membership into binary tables '''    
     df_nc_alleles, df_nc_genes = build_genetic_feature_tables(
         output_nr_clstr, genome_noncoding_paths, name, cluster_type='noncoding', 
-        output_format=output_format, header_to_allele=header_to_allele)
+        output_format=output_format, header_to_allele=header_to_allele, n_jobs=n_jobs)
     df_nc_alleles.columns = [x.replace('_noncoding' + fna_output_footer,'') for x in df_nc_alleles.columns]
     df_nc_genes.columns = [x.replace('_noncoding' + fna_output_footer,'') for x in df_nc_genes.columns]
     
     ''' Saving gene and allele tables '''
-    output_allele_table = output_dir + '/' + name + '_strain_by_noncoding_allele'
-    output_gene_table = output_dir + '/' + name + '_strain_by_noncoding_gene'
-    output_allele_table = output_allele_table.replace('//','/')
-    output_gene_table = output_gene_table.replace('//','/')
+    output_allele_table = os.path.join(output_dir, name + '_strain_by_noncoding_allele')
+    output_gene_table = os.path.join(output_dir, name + '_strain_by_noncoding_gene')
     if output_format == 'lsdf':
         ''' Saving to NPZ + NPZ.TXT (see sparse_utils.LightSparseDataFrame) '''
         output_allele_npz = output_allele_table + '.npz'
@@ -310,30 +319,29 @@ def build_noncoding_pangenome(genome_data, output_dir, name='Test', flanking=(0,
         output_allele_pickle = output_allele_table + '.pickle.gz'
         output_gene_pickle = output_gene_table + '.pickle.gz'
         print('Saving', output_allele_pickle, '...')
-        df_nc_alleles.to_pickle(output_allele_pickle)
+        df_nc_alleles.to_pickle(output_allele_pickle, compression=PICKLE_COMPRESSION)
         print('Saving', output_gene_pickle, '...')
-        df_nc_genes.to_pickle(output_gene_pickle)
+        df_nc_genes.to_pickle(output_gene_pickle, compression=PICKLE_COMPRESSION)
     return df_nc_alleles, df_nc_genes
     
 def find_matching_genome_files(gff_dir, fna_dir):
-    # Get a list of GFF files and FNA files in the directories
-    gff_files = [f for f in os.listdir(gff_dir) if f.endswith('.gff')]
-    fna_files = [f for f in os.listdir(fna_dir) if f.endswith('.fna')]
-
     # Create a dictionary to store GFF file names (excluding extensions) as keys
-    # and their full paths as values
-    gff_dict = {os.path.splitext(f)[0]: os.path.join(gff_dir, f) for f in gff_files}
+    # and their full paths as values, scandir entries already carry both
+    with os.scandir(gff_dir) as gff_entries:
+        gff_dict = {os.path.splitext(e.name)[0]: e.path for e in gff_entries if e.name.endswith('.gff')}
 
     # Iterate through FNA files and find matching GFF files based on base names
     matching_files = []
-    for fna_file in fna_files:
-        base_name = os.path.splitext(fna_file)[0]
-        if base_name in gff_dict:
-            matching_files.append((gff_dict[base_name], os.path.join(fna_dir, fna_file)))
+    with os.scandir(fna_dir) as fna_entries:
+        for fna_entry in fna_entries:
+            if fna_entry.name.endswith('.fna'):
+                base_name = os.path.splitext(fna_entry.name)[0]
+                if base_name in gff_dict:
+                    matching_files.append((gff_dict[base_name], fna_entry.path))
 
     return matching_files
 
-def consolidate_seqs(genome_paths, nr_out, shared_headers_out, missing_headers_out=None):
+def consolidate_seqs(genome_paths, nr_out, shared_headers_out, missing_headers_out=None, n_jobs=1):
     ''' 
     Combines sequences for many genomes into a single file without duplicate
     sequences to be clustered using CD-Hit, i.e. with cluster_with_cdhit(). Tracks
@@ -349,53 +357,46 @@ def consolidate_seqs(genome_paths, nr_out, shared_headers_out, missing_headers_o
         Output path for shared headers TSV file
     missing_headers_out : str
         Output path for headers without sequences TXT file (default None)
+    n_jobs : int
+        Number of parallel jobs for hashing genome files (default 1)
 
     Returns
     -------
     non_redundant_seq_hashes : dict
-        Maps non-redundant sequence hashes to a list of headers, in order observed
+        Maps non-redundant sequence hashes to the first header observed with 
+        that sequence, in order observed. Headers sharing a sequence are 
+        saved to shared_headers_out.
     missing_headers : list
         List of headers without any associated sequence
     '''
-    non_redundant_seq_hashes = {} # maps sequence hash to headers of that sequence, in order observed
-    encounter_order = [] # stores sequence hashes in order encountered
+    non_redundant_seq_hashes = {} # maps sequence hash to first header of that sequence, in order observed
+    shared_seq_headers = {} # maps sequence hash to all its headers as tab-separated bytes, only for repeated sequences
     missing_headers = [] # stores headers without sequences
     
-    def process_header_and_seq(header, seq_blocks, output_file):
-        ''' Processes a header/sequence pair against the running list of non-redundant sequences '''
-        seq = ''.join(seq_blocks)
-        if len(header) > 0 and len(seq) > 0: # valid header-sequence record
-            seqhash = __hash_sequence__(seq)
-            if seqhash in non_redundant_seq_hashes: # record repeated appearances of sequence
-                non_redundant_seq_hashes[seqhash].append(header)
-            else: # first encounter of a sequence, record to non-redundant file
-                encounter_order.append(seqhash)
-                non_redundant_seq_hashes[seqhash] = [header]
-                output_file.write('>' + header + '\n')
-                output_file.write('\n'.join(seq_blocks) + '\n')
-        elif len(header) > 0 and len(seq) == 0: # header without sequence
-            missing_headers.append(header)
-    
     ''' Scan for redundant sequences across all files, build non-redundant file '''
-    with open(nr_out, 'w+') as f_nr_out:
-        for genome_path in genome_paths:
-            with open(genome_path, 'r') as f:
-                header = ''; seq_blocks = []
-                for line in f:
-                    if line[0] == '>': # header encountered
-                        process_header_and_seq(header, seq_blocks, f_nr_out)
-                        header = __get_header_from_fasta_line__(line)
-                        seq_blocks = []
-                    else: # sequence line encountered
-                        seq_blocks.append(line.strip())
-                process_header_and_seq(header, seq_blocks, f_nr_out) # process last record
+    pool = mp.Pool(processes=n_jobs) if n_jobs > 1 else contextlib.nullcontext()
+    with pool as p, open(nr_out, 'wb', buffering=1<<22) as f_nr_out: # 4 MB buffer for large non-redundant files
+        if n_jobs > 1: # parallel jobs, hash files in parallel and merge in order
+            genome_records = p.imap(__hash_fasta_records__, genome_paths)
+        else: # single job
+            genome_records = map(__hash_fasta_records__, genome_paths)
+        for records, genome_missing_headers, genome_seqs in genome_records:
+            for header, seqhash in records:
+                if seqhash in shared_seq_headers: # record repeated appearances of sequence
+                    shared_seq_headers[seqhash] += b'\t' + header.encode('utf-8')
+                elif seqhash in non_redundant_seq_hashes: # second appearance of sequence
+                    shared_seq_headers[seqhash] = bytearray(
+                        non_redundant_seq_hashes[seqhash].encode('utf-8') + b'\t' + header.encode('utf-8'))
+                else: # first encounter of a sequence, record to non-redundant file
+                    non_redundant_seq_hashes[seqhash] = header
+                    f_nr_out.writelines((b'>', header.encode('utf-8'), b'\n', genome_seqs[seqhash], b'\n'))
+            missing_headers += genome_missing_headers
                 
     ''' Save shared and missing headers to file '''
-    with open(shared_headers_out, 'w+') as f_header_out:
-        for seqhash in encounter_order:
-            headers = non_redundant_seq_hashes[seqhash]
-            if len(headers) > 1:
-                f_header_out.write('\t'.join(headers) + '\n')
+    with open(shared_headers_out, 'wb') as f_header_out: # shared headers already tab-joined
+        for seqhash in non_redundant_seq_hashes: # sequences in order encountered
+            if seqhash in shared_seq_headers:
+                f_header_out.writelines((shared_seq_headers[seqhash], b'\n'))
     if missing_headers_out:
         print('Headers without sequences:', len(missing_headers))
         with open(missing_headers_out, 'w+') as f_header_out:
@@ -414,15 +415,13 @@ def list_faa_files(directory_path):
     Returns:
     list: A list of FAA file paths in the specified directory.
     """
-    # List all files in the directory
-    all_files = os.listdir(directory_path)
-
-    # Filter the list to include only FAA files (files with the .faa extension)
-    faa_files = [os.path.join(directory_path, filename) for filename in all_files if filename.endswith(".faa")]
+    # List all files in the directory, keeping only FAA files (files with the .faa extension)
+    with os.scandir(directory_path) as entries:
+        faa_files = [entry.path for entry in entries if entry.name.endswith(".faa")]
 
     return faa_files
                 
-def cluster_with_cdhit(fasta_file, cdhit_out, cdhit_args={'-n':5, '-c':0.8}):
+def cluster_with_cdhit(fasta_file, cdhit_out, cdhit_args={'-n':5, '-c':0.8, '-T':0}, verbose=True):
     '''
     Runs CD-Hit on a fasta file, i.e. one generated by consolidate_seqs().
     Requires CD-Hit to be available in PATH. Uses CD-HIT for FAA files (default),
@@ -439,15 +438,22 @@ def cluster_with_cdhit(fasta_file, cdhit_out, cdhit_args={'-n':5, '-c':0.8}):
         Path to be provided to CD-Hit output argument
     cdhit_args : dict
         Dictionary of alignment arguments to be provided to CD-Hit, other than
-        -i, -o, and -d. Default is for FAA files. (default {'-n':5, '-c':0.8})
+        -i, -o, and -d. Default is for FAA files, with "-T 0" to use all 
+        available CPUs. (default {'-n':5, '-c':0.8, '-T':0})
+    verbose : bool
+        If True, streams CD-Hit output to the console as it runs. Otherwise,
+        discards CD-Hit output. Either way, raises an error if CD-Hit fails (default True)
     ''' 
     cdhit_prog = 'cd-hit-est' if fasta_file[-4:].lower() == '.fna' else 'cd-hit'
     args = [cdhit_prog, '-i', fasta_file, '-o', cdhit_out, '-d', '0']
     for arg in cdhit_args:
         args += [arg, str(cdhit_args[arg])]
     print('Running:', args)
-    for line in __stream_stdout__(' '.join(args)):
-        print(line)
+    if verbose: # stream progress line by line
+        for line in __stream_stdout__(args):
+            print(line)
+    else: # run quietly, no per-line handling
+        sp.run(args, stdout=sp.DEVNULL, check=True)
 
         
 def rename_genes_and_alleles(clstr_file, nr_fasta_in, nr_fasta_out, 
@@ -499,38 +505,29 @@ def rename_genes_and_alleles(clstr_file, nr_fasta_in, nr_fasta_out,
                 shared_headers[representative_header] = synonym_headers
     
     ''' Read through CLSTR file to map original headers to C#A#/T#A# names '''
+    repr_header_to_allele = __load_clstr_header_to_allele__(clstr_file, name, cluster_type)
     header_to_allele = {} # maps headers to allele name (name_C#A# or name_T#A#)
-    max_cluster = 0 
     with open(feature_names_out, 'w+') as f_naming:
-        with open(clstr_file, 'r') as f_clstr:
-            for line in f_clstr:
-                if line[0] == '>': # starting new gene cluster
-                    cluster_num = line.split()[-1].strip() # cluster number as string
-                    max_cluster = cluster_num
-                else: # adding allele to cluster
-                    data = line.split()
-                    allele_num = data[0] # allele number as string
-                    allele_header = data[2][1:-3] # old allele header
-                    allele_name = create_feature_name(name, cluster_type, cluster_num, 'allele', allele_num)
-                    header_to_allele[allele_header] = allele_name
-                    mapped_headers = [allele_header]
-                    if allele_header in shared_headers: # if synonym headers are available
-                        for synonym_header in shared_headers[allele_header]:
-                            header_to_allele[synonym_header] = allele_name
-                        mapped_headers += shared_headers[allele_header]
-                    f_naming.write(allele_name + '\t' + ('\t'.join(mapped_headers)).strip() + '\n')
+        for allele_header, allele_name in repr_header_to_allele.items():
+            header_to_allele[allele_header] = allele_name
+            mapped_headers = [allele_header]
+            if allele_header in shared_headers: # if synonym headers are available
+                for synonym_header in shared_headers[allele_header]:
+                    header_to_allele[synonym_header] = allele_name
+                mapped_headers += shared_headers[allele_header]
+            f_naming.write(allele_name + '\t' + ('\t'.join(mapped_headers)).strip() + '\n')
                     
-    ''' Create the fasta file with renamed features '''
-    with open(nr_fasta_in, 'r') as f_fasta_old:
-        with open(nr_fasta_out + '.tmp', 'w+') as f_fasta_new:
+    ''' Create the fasta file with renamed features, streamed as bytes '''
+    with open(nr_fasta_in, 'rb') as f_fasta_old:
+        with open(nr_fasta_out + '.tmp', 'wb', buffering=1<<20) as f_fasta_new:
             ''' Iterate through alleles in cluster/allele order '''
             missing = True # if currently in a sequence without a header
             for line in f_fasta_old:
-                if line[0] == '>': # writing updated header line
-                    allele_header = line[1:].strip()
+                if line[:1] == b'>': # writing updated header line
+                    allele_header = line[1:].strip().decode('utf-8')
                     if allele_header in header_to_allele:
                         allele_name = header_to_allele[allele_header]
-                        f_fasta_new.write('>' + allele_name + '\n')
+                        f_fasta_new.write(b'>' + allele_name.encode('utf-8') + b'\n')
                         missing = False
                     else:
                         print('MISSING:', allele_header)
@@ -538,10 +535,8 @@ def rename_genes_and_alleles(clstr_file, nr_fasta_in, nr_fasta_out,
                 elif not missing: # writing sequence line
                     f_fasta_new.write(line)
     
-    ''' Move fasta file to desired output path '''
-    if nr_fasta_out == nr_fasta_in: # if overwriting, remove old faa file
-        os.remove(nr_fasta_in) 
-    os.rename(nr_fasta_out + '.tmp', nr_fasta_out)
+    ''' Move fasta file to desired output path, replacing the original if overwriting '''
+    os.replace(nr_fasta_out + '.tmp', nr_fasta_out)
     
     ''' If available, use exonerate.fastasort to sort entries in fasta file '''
     if fastasort_path:
@@ -562,7 +557,7 @@ def rename_genes_and_alleles(clstr_file, nr_fasta_in, nr_fasta_out,
 
 def build_genetic_feature_tables(clstr_file, genome_fasta_paths, name='Test', cluster_type='cds',
                                  output_format='lsdf', shared_header_file=None, header_to_allele=None,
-                                 log_rate=LOG_RATE):
+                                 log_rate=LOG_RATE, n_jobs=1):
     '''
     Builds two binary tables based on the presence/absence of genetic features, 
     allele x genome (allele_table_out) and gene x genome (gene_table_out).
@@ -594,6 +589,8 @@ def build_genetic_feature_tables(clstr_file, genome_fasta_paths, name='Test', cl
         if available from rename_genes_and_alleles() (default None)
     log_rate : int
         Interval to report conversion of genomes to binary vector (default 10)
+    n_jobs : int
+        Number of parallel jobs for scanning genome fasta files (default 1)
 
     Returns 
     -------
@@ -606,73 +603,72 @@ def build_genetic_feature_tables(clstr_file, genome_fasta_paths, name='Test', cl
     ''' Load header-allele mappings '''
     print('Loadings header-allele mappings...')
     header_to_allele = load_header_to_allele(clstr_file, 
-        shared_header_file, header_to_allele, cluster_type)
+        shared_header_file, header_to_allele, name=name, cluster_type=cluster_type)
                     
     ''' Initialize gene and allele tables '''
     genome_order = sorted([__get_genome_from_filename__(x) for x in genome_fasta_paths]) 
         # for genome names, trim .faa from filenames
     print('Sorting alleles...')
-    allele_order = sorted(list(set(header_to_allele.values())))
+    allele_order = sorted(set(header_to_allele.values()))
     
     print('Sorting clusters...')
-    gene_order = []; last_gene = None
-    for allele in allele_order:
-        gene = __get_gene_from_allele__(allele)
-        if gene != last_gene:
-            gene_order.append(gene)
-            last_gene = gene
+    allele_genes = [__get_gene_from_allele__(allele) for allele in allele_order]
+    gene_order = list(dict.fromkeys(allele_genes)) # genes by first sorted allele, need not be contiguous
     print('Genomes:', len(genome_order))
     print('Clusters:', len(gene_order))
     print('Alleles:', len(allele_order))
     
     ''' To use sparse matrices, map genomes, alleles, and genes to positions '''
+    genome_indices = {genome_order[i]:i for i in range(len(genome_order))}
     allele_indices = {allele_order[i]:i for i in range(len(allele_order))}
     gene_indices = {gene_order[i]:i for i in range(len(gene_order))} 
-    sp_alleles = scipy.sparse.dok_matrix((len(allele_order), len(genome_order)), dtype='int')
-    sp_genes = scipy.sparse.dok_matrix((len(gene_order), len(genome_order)), dtype='int') 
+    allele_gene_indices = [gene_indices[gene] for gene in allele_genes]
+        # maps allele position to its gene position
+    allele_rows = []; allele_cols = [] # COO coordinates of non-zero allele entries
+    gene_rows = []; gene_cols = [] # COO coordinates of non-zero gene entries
         
     ''' Scan original genome file for allele and gene membership '''
-    for i, genome_fasta in enumerate(sorted(genome_fasta_paths)):
-        genome = __get_genome_from_filename__(genome_fasta)
-        genome_i = genome_order.index(genome)
-        with open(genome_fasta, 'r') as f_fasta:
-            header = ''; seq = '' # track the sequence to skip over empty sequences
-            for line in f_fasta.readlines(): # pre-load, slight speed-up
+    genome_fasta_paths = sorted(genome_fasta_paths)
+    pool = mp.Pool(processes=n_jobs) if n_jobs > 1 else contextlib.nullcontext()
+    with pool as p:
+        if n_jobs > 1: # parallel jobs, only parse files in parallel
+            genome_headers = p.imap(__load_headers_with_sequences__, genome_fasta_paths)
+        else: # single job
+            genome_headers = map(__load_headers_with_sequences__, genome_fasta_paths)
+        for i, genome_fasta_headers in enumerate(zip(genome_fasta_paths, genome_headers)):
+            genome_fasta, headers = genome_fasta_headers
+            genome = __get_genome_from_filename__(genome_fasta)
+            genome_i = genome_indices[genome]
+            genome_alleles = set(); genome_genes = set() # avoid duplicate coordinates
+            for header in headers:
                 ''' Load all alleles and genes per genome '''
-                if line[0] == '>': # new header line encountered
-                    if len(seq) > 0:
-                        if header in header_to_allele:
-                            allele_name = header_to_allele[header]
-                            allele_i = allele_indices[allele_name]
-                            gene = __get_gene_from_allele__(allele_name)
-                            gene_i = gene_indices[gene]
-                            sp_alleles[allele_i,genome_i] = 1
-                            sp_genes[gene_i,genome_i] = 1
-                        else:
-                            print('MISSING:', header)
-                    header = __get_header_from_fasta_line__(line)
-                    seq = '' # reset sequence
-                else: # sequence line encountered
-                    seq += line.strip()
-            if len(seq) > 0: # process last entry
-                if header in header_to_allele:
-                    allele_name = header_to_allele[header]
+                allele_name = header_to_allele.get(header)
+                if allele_name is not None:
                     allele_i = allele_indices[allele_name]
-                    gene = __get_gene_from_allele__(allele_name)
-                    gene_i = gene_indices[gene]
-                    sp_alleles[allele_i,genome_i] = 1
-                    sp_genes[gene_i,genome_i] = 1
+                    gene_i = allele_gene_indices[allele_i]
+                    if not allele_i in genome_alleles:
+                        genome_alleles.add(allele_i)
+                        allele_rows.append(allele_i); allele_cols.append(genome_i)
+                    if not gene_i in genome_genes:
+                        genome_genes.add(gene_i)
+                        gene_rows.append(gene_i); gene_cols.append(genome_i)
                 else:
                     print('MISSING:', header)
-        if (i+1) % log_rate == 0:
-            print('Updating genome', i+1, ':', genome)
+            if (i+1) % log_rate == 0:
+                print('Updating genome', i+1, ':', genome)
     
     ''' Export binary matrix with index labels '''
     print('Building binary matrix...')
+    sp_alleles = scipy.sparse.coo_matrix(
+        (np.ones(len(allele_rows), dtype='int'), (allele_rows, allele_cols)),
+        shape=(len(allele_order), len(genome_order)))
+    sp_genes = scipy.sparse.coo_matrix(
+        (np.ones(len(gene_rows), dtype='int'), (gene_rows, gene_cols)),
+        shape=(len(gene_order), len(genome_order)))
     df_alleles = pangenomix.sparse_utils.LightSparseDataFrame(
-        index=allele_order, columns=genome_order, data=sp_alleles.tocoo())
+        index=allele_order, columns=genome_order, data=sp_alleles)
     df_genes = pangenomix.sparse_utils.LightSparseDataFrame(
-        index=gene_order, columns=genome_order, data=sp_genes.tocoo())    
+        index=gene_order, columns=genome_order, data=sp_genes)    
     if output_format == 'sparr':
         print('Converting to SparseArrays...')
         df_alleles = df_alleles.to_sparse_arrays()
@@ -712,20 +708,11 @@ def load_header_to_allele(clstr_file=None, shared_header_file=None,
     
     ''' Load header to allele mapping from CLSTR, if not provided '''
     if header_to_allele is None:
-        full_header_to_allele = {} # maps representative header to allele name (name_C#A#)
-        with open(clstr_file, 'r') as f_clstr:
-            for line in f_clstr:
-                if line[0] == '>': # starting new gene cluster
-                    cluster_num = line.split()[-1].strip() # cluster number as string
-                    max_cluster = cluster_num
-                else: # adding allele to cluster
-                    data = line.split()
-                    allele_num = data[0] # allele number as string
-                    allele_header = data[2][1:-3] # old allele header
-                    allele_name = create_feature_name(name, cluster_type, cluster_num, 'allele', allele_num)
-                    full_header_to_allele[allele_header] = allele_name
-    elif type(header_to_allele) == dict:
+        full_header_to_allele = __load_clstr_header_to_allele__(clstr_file, name, cluster_type)
+    elif shared_header_file: # copy before adding synonyms
         full_header_to_allele = header_to_allele.copy()
+    else: # nothing to add, use as is
+        full_header_to_allele = header_to_allele
     
     ''' Load headers that share the same sequence '''
     if shared_header_file:
@@ -850,11 +837,10 @@ def build_proximal_pangenome(genome_data, allele_names, output_dir, limits, side
         ''' Prepare output path for extracted proximal regions '''
         genome_gff, genome_fna = gff_fna
         genome = __get_genome_from_filename__(genome_gff)
-        genome_dir = '/'.join(genome_gff.split('/')[:-1]) + '/' if '/' in genome_gff else ''
-        genome_prox_dir = genome_dir + 'derived/'
+        genome_prox_dir = os.path.join(os.path.dirname(genome_gff), 'derived')
         if not os.path.exists(genome_prox_dir):
             os.mkdir(genome_prox_dir)
-        genome_prox = genome_prox_dir + genome + '_' + side + fna_output_footer + '.fna'
+        genome_prox = os.path.join(genome_prox_dir, genome + '_' + side + fna_output_footer + '.fna')
         genome_proximals.append(genome_prox)
             
         ''' Extract proximal sequences '''
@@ -868,8 +854,7 @@ def build_proximal_pangenome(genome_data, allele_names, output_dir, limits, side
         
     ''' Consolidate non-redundant proximal sequences per gene '''
     print('Identifying non-redundant', side, 'sequences per gene...')
-    nr_prox_out = output_dir + '/' + name + '_nr_' + side + '.fna'
-    nr_prox_out = nr_prox_out.replace('//','/')
+    nr_prox_out = os.path.join(output_dir, name + '_nr_' + side + '.fna')
     df_proximal = consolidate_proximal(genome_proximals, nr_prox_out, 
         feature_to_allele, side, output_format=output_format)
     
@@ -882,8 +867,7 @@ def build_proximal_pangenome(genome_data, allele_names, output_dir, limits, side
         os.rename(nr_prox_out + '.tmp', nr_prox_out)
         
     ''' Save proximal x genome table '''
-    prox_table_out = output_dir + '/' + name + '_strain_by_' + side
-    prox_table_out = prox_table_out.replace('//','/')
+    prox_table_out = os.path.join(output_dir, name + '_strain_by_' + side)
     if output_format == 'lsdf':
         ''' Saving to NPZ + NPZ.TXT (see sparse_utils.LightSparseDataFrame) '''
         prox_table_npz = prox_table_out + '.npz'
@@ -893,7 +877,7 @@ def build_proximal_pangenome(genome_data, allele_names, output_dir, limits, side
         ''' Saving to legacy format PICKLE.GZ (SparseArray structure) '''
         prox_table_pickle = prox_table_out + '.pickle.gz'
         print('Saving', prox_table_pickle, '...')
-        df_proximal.to_pickle(prox_table_pickle)
+        df_proximal.to_pickle(prox_table_pickle, compression=PICKLE_COMPRESSION)
     return df_proximal
 
     
@@ -926,85 +910,61 @@ def consolidate_proximal(genome_proximals, nr_proximal_out, feature_to_allele, s
         Binary proximal x genome table (see output_format)
     '''
     ftype_abb = VARIANT_TYPES[side]
-    gene_to_unique_proximal = {} # maps gene:prox_seq:prox_seq_id (int)
-    genome_to_proximal = {} # maps genome:proximal_name:1 if present (<name>_C#U# or <name>_C#D#)
-    unique_proximal_ids = set() # record non-redundant list of proximal sequence IDs <name>_C#U# or <name>_C#D#
+    prox_footer = '_' + side + '(' # header footer separating feature name from coordinates
+    allele_to_gene = {allele:__get_gene_from_allele__(allele) for allele in set(feature_to_allele.values())}
+    feature_to_gene = {feature:allele_to_gene[allele] for feature, allele in feature_to_allele.items()}
+    del allele_to_gene
+    gene_to_unique_proximal = {} # maps gene:prox_seq:(prox_seq_id (int), first appearance row)
+    unique_proximal_ids = [] # record non-redundant list of proximal sequence IDs <name>_C#U# or <name>_C#D#
+    prox_rows = []; prox_cols = [] # COO coordinates, rows indexed by order of first appearance
     genome_order = [] # sorted list of genomes inferred from proximal sequence file names
     
-    with open(nr_proximal_out, 'w+') as f_nr_prox:
+    with open(nr_proximal_out, 'wb', buffering=1<<20) as f_nr_prox: # buffered binary output, one write per record
         for genome_proximal in sorted(genome_proximals):
             ''' Infer genome name from genome filename '''
-            genome = genome_proximal.split('/')[-1] # trim off full path
+            genome = os.path.basename(genome_proximal) # trim off full path
             genome = genome.split('_' + side)[0] # remove .fna footer
-            genome_to_proximal[genome] = {}
+            genome_i = len(genome_order)
             genome_order.append(genome)
+            genome_prox_rows = set() # proximal rows already recorded for this genome
             
             ''' Process genome's proximal record '''
-            with open(genome_proximal, 'r') as f_prox: # reading current proximal seq file
-                header = ''; prox_seq = ''; new_sequence = False
-                for line in f_prox.readlines(): # slight speed up reading whole file at once, should only be few MBs
-                    if line[0] == '>': # header line
-                        if len(prox_seq) > 0:
-                            ''' Process header-seq to non-redundant <name>_C#<U/D># proximal allele '''
-                            feature = header.split('_' + side + '(')[0] # trim off "_<up/down>stream" footer
-                            allele = feature_to_allele[feature] # get <name>_C#A# allele
-                            gene = __get_gene_from_allele__(allele) # gene <name>_C# gene
-                            if not gene in gene_to_unique_proximal:
-                                gene_to_unique_proximal[gene] = {}
-                            if not prox_seq in gene_to_unique_proximal[gene]:
-                                gene_to_unique_proximal[gene][prox_seq] = len(gene_to_unique_proximal[gene])
-                                prox_id = gene + ftype_abb + str(gene_to_unique_proximal[gene][prox_seq])
-                                unique_proximal_ids.add(prox_id)
-                                new_sequence = True
-                            prox_id = gene + ftype_abb + str(gene_to_unique_proximal[gene][prox_seq])
-                            genome_to_proximal[genome][prox_id] = 1
-                            
-                            ''' Write renamed sequence to running file '''
-                            if new_sequence:
-                                f_nr_prox.write('>' + prox_id + '\n')
-                                f_nr_prox.write(prox_seq + '\n')
-                                new_sequence = False
-
-                        header = line[1:].strip(); prox_seq = ''
-                    else: # sequence line
-                        prox_seq += line.strip()
-            
-                ''' Process last record'''
-                feature = header.split('_' + side + '(')[0] # trim off "_<up/down>stream" footer
-                allele = feature_to_allele[feature] # get <name>_C#A# allele
-                gene = __get_gene_from_allele__(allele) # gene <name>_C# gene
+            for header, prox_seq in __iter_fasta_records__(genome_proximal):
+                ''' Process header-seq to non-redundant <name>_C#<U/D># proximal allele '''
+                feature = header.decode('utf-8').rpartition(prox_footer)[0] # trim off "_<up/down>stream" footer
+                gene = feature_to_gene[feature] # feature -> <name>_C# gene
                 if not gene in gene_to_unique_proximal:
                     gene_to_unique_proximal[gene] = {}
-                if not prox_seq in gene_to_unique_proximal[gene]:
-                    gene_to_unique_proximal[gene][prox_seq] = len(gene_to_unique_proximal[gene])
-                    prox_id = gene + ftype_abb + str(gene_to_unique_proximal[gene][prox_seq])
-                    unique_proximal_ids.add(prox_id)
-                    new_sequence = True
-                prox_id = gene + ftype_abb + str(gene_to_unique_proximal[gene][prox_seq])
-                genome_to_proximal[genome][prox_id] = 1
-
+                new_sequence = not prox_seq in gene_to_unique_proximal[gene]
+                if new_sequence:
+                    gene_to_unique_proximal[gene][prox_seq] = (len(gene_to_unique_proximal[gene]), len(unique_proximal_ids))
+                prox_num, prox_row = gene_to_unique_proximal[gene][prox_seq]
+                prox_id = gene + ftype_abb + str(prox_num)
+                if new_sequence:
+                    unique_proximal_ids.append(prox_id)
+                if not prox_row in genome_prox_rows:
+                    genome_prox_rows.add(prox_row)
+                    prox_rows.append(prox_row)
+                    prox_cols.append(genome_i)
+                
                 ''' Write renamed sequence to running file '''
                 if new_sequence:
-                    f_nr_prox.write('>' + prox_id + '\n')
-                    f_nr_prox.write(prox_seq + '\n')
-                    new_sequence = False
+                    f_nr_prox.write(b'>' + prox_id.encode('utf-8') + b'\n' + prox_seq + b'\n')
                     
-    ''' Convert nested dict to dict into sparse matrix once all proximal sequences are known '''
+    ''' Reorder proximal rows alphabetically once all proximal sequences are known '''
     print('Sparsifying', side, 'table...')
-    prox_order = sorted(list(unique_proximal_ids))
+    prox_order = sorted(unique_proximal_ids)
+    prox_ranks = np.empty(len(unique_proximal_ids), dtype='int64') # maps order of first appearance to sorted index
+    prox_ranks[np.argsort(unique_proximal_ids)] = np.arange(len(unique_proximal_ids))
+    prox_rows = prox_ranks[np.array(prox_rows, dtype='int64')]
     del unique_proximal_ids
-    prox_indices = {prox_order[i]:i for i in range(len(prox_order))} # map proximal ID to index
-    
-    sp_proximal = scipy.sparse.dok_matrix((len(prox_order), len(genome_order)), dtype='int')
-    for genome_i,genome in enumerate(genome_order):
-        prox_array = np.zeros(shape=len(prox_order), dtype='int64')
-        for genome_prox in genome_to_proximal[genome].keys():
-            prox_i = prox_indices[genome_prox]
-            sp_proximal[prox_i, genome_i] = 1
             
     print('Building binary matrix...')
+    sp_proximal = scipy.sparse.coo_matrix(
+        (np.ones(len(prox_rows), dtype='int'), (prox_rows, prox_cols)),
+        shape=(len(prox_order), len(genome_order)))
     df_proximal = pangenomix.sparse_utils.LightSparseDataFrame(
-        index=prox_order, columns=genome_order, data=sp_proximal.tocoo())
+        index=prox_order, columns=genome_order, data=sp_proximal)
     if output_format == 'sparr':
         print('Converting to SparseArrays...')
         df_proximal = df_proximal.to_sparse_arrays()
@@ -1099,9 +1059,11 @@ def extract_proximal_sequences(genome_gff, genome_fna, proximal_out, limits, max
                 utr_stop = rightbound
             
         ''' Extract UTR from computed bounds, RC if negative strand '''
-        proximal = contig_seq[utr_start:utr_stop].strip()
-        proximal = reverse_complement(proximal) if strand == '-' else proximal
         is_fragment = (utr_start < 0) or (utr_stop > len(contig_seq)) # if cut-off by contig bounds
+        if is_fragment and not include_fragments: # will be discarded, skip slicing
+            return b'', is_fragment
+        proximal = contig_seq[utr_start:utr_stop] # contigs are loaded without whitespace
+        proximal = reverse_complement(proximal) if strand == '-' else proximal
         return proximal, is_fragment
     
     
@@ -1112,7 +1074,7 @@ def extract_proximal_sequences(genome_gff, genome_fna, proximal_out, limits, max
         with open(genome_gff, 'r') as f_gff:
             for line in f_gff:
                 line = line.strip()
-                if len(line) > 0 and line[0] != '#':
+                if len(line) > 0 and line[:1] != '#':
                     contig, src, feat_type, start, stop, score, \
                         strand, phase, attr_raw = line.split('\t')
                     if feat_type == 'CDS': # only consider CDS-UTR overlaps
@@ -1136,16 +1098,16 @@ def extract_proximal_sequences(genome_gff, genome_fna, proximal_out, limits, max
                     strand_occupancy[contig][strand][feature] = (leftbound, rightbound) 
         del occupancies
                         
-    ''' Load contig sequences '''
-    contigs = load_sequences_from_fasta(genome_fna, header_fxn=lambda x: x.split()[0])
+    ''' Load contig sequences as bytes, UTRs are sliced and written without decoding '''
+    contigs = load_sequences_from_fasta(genome_fna, header_fxn=lambda x: x.split()[0], seq_fxn=str.encode)
             
-    ''' Load header-allele name mapping '''
+    ''' Load headers of mapped features, only membership is needed here '''
     if feature_to_allele: # dictionary provided directly
-        feat_to_allele = feature_to_allele
+        mapped_features = feature_to_allele.keys()
     elif allele_names: # allele map file provided
-        feat_to_allele = __load_feature_to_allele__(allele_names)
+        mapped_features = set(__load_feature_to_allele__(allele_names))
     else: # no allele mapping, process everything
-        feat_to_allele = None
+        mapped_features = None
                     
     ''' Parse GFF file for CDS coordinates '''
     feature_footer = '_' + side
@@ -1153,32 +1115,27 @@ def extract_proximal_sequences(genome_gff, genome_fna, proximal_out, limits, max
     feature_footer += str(params).replace(' ','')
     proximal_count = 0 # total UTRs extracted
     coding_length = limits[1] if side == 'upstream' else -limits[0] # bases of UTR that overlap with reference gene CDS
-    with open(proximal_out, 'w+') as f_prox:
+    with open(proximal_out, 'wb', buffering=1<<20) as f_prox: # buffered binary output, one write per record
         with open(genome_gff, 'r') as f_gff:
             for line in f_gff:
-                line = line.strip()
-                if len(line) > 0 and line[0] != '#':
+                if line[:1] != '#' and not line.isspace() and len(line) > 0:
                     contig, src, feat_type, start, stop, score, \
-                        strand, phase, attr_raw = line.split('\t')
-                    contig = contig.split('|')[-1] # accn|<contig> to just <contig>
-                    start = int(start) - 1 # starts are 1-indexed, inclusive
-                    stop = int(stop) # stops 1-indexed, inclusive = correct exclusive bound
-                    attrs = {} # key:value
-                    for entry in attr_raw.split(';'):
-                        k,v = entry.split('='); attrs[k] = v
-                    gffid = attrs['ID']
-
-                    ''' Verify allele has been mapped, and contig has been identified '''
-                    if contig in contigs: 
-                        if gffid in feat_to_allele or feat_to_allele is None:
-                            contig_seq = contigs[contig]
+                        strand, phase, attr_raw = line.split('\t', 8)
+                    contig = contig.rpartition('|')[2] # accn|<contig> to just <contig>
+
+                    ''' Verify contig has been identified, and allele has been mapped '''
+                    contig_seq = contigs.get(contig)
+                    if contig_seq is not None: 
+                        gffid = __get_gff_attribute__(attr_raw.rstrip(), 'ID')
+                        if mapped_features is None or gffid in mapped_features:
+                            start = int(start) - 1 # starts are 1-indexed, inclusive
+                            stop = int(stop) # stops 1-indexed, inclusive = correct exclusive bound
                             proximal, is_fragment = extract_utr(start, stop, strand, contig, contig_seq, strand_occupancy)
                                 
                             ''' Save proximal sequence '''
                             if len(proximal) > coding_length and (not is_fragment or include_fragments):
                                 feat_name = gffid + feature_footer
-                                f_prox.write('>' + feat_name + '\n')
-                                f_prox.write(proximal + '\n')
+                                f_prox.write(b'>' + feat_name.encode('utf-8') + b'\n' + proximal + b'\n')
                                 proximal_count += 1
                                 
     print('Loaded', side, 'sequences:', proximal_count)
@@ -1211,11 +1168,11 @@ def extract_noncoding(genome_gff, genome_fna, noncoding_out, flanking=(0,0),
         (default ['transcript', 'tRNA', 'rRNA', 'misc_binding'])
     '''
     contigs = load_sequences_from_fasta(genome_fna, header_fxn=lambda x:x.split()[0])
-    with open(noncoding_out, 'w+') as f_noncoding:
+    with open(noncoding_out, 'w+', buffering=1<<20) as f_noncoding: # large buffer, one write per record
         with open(genome_gff, 'r') as f_gff:
             for line in f_gff:
                 ''' Check for non-comment and non-empty line '''
-                if not line[0] == '#' and not len(line.strip()) == 0: 
+                if not line[:1] == '#' and not len(line.strip()) == 0: 
                     contig, src, feature_type, start, stop, \
                         score, strand, phase, meta = line.split('\t')
                     contig = contig[5:] # trim off "accn|" header
@@ -1224,23 +1181,21 @@ def extract_noncoding(genome_gff, genome_fna, noncoding_out, flanking=(0,0),
                     
                     if feature_type in allowed_features: 
                         ''' Check if contig exists in the dictionary '''
-                        if contig in contigs:
+                        contig_seq = contigs.get(contig)
+                        if contig_seq is not None:
                             ''' Get noncoding feature sequence and ID '''
-                            contig_seq = contigs[contig]
                             fstart = start - 1 - flanking[0]
                             fstart = max(0,fstart) # avoid looping due to contig boundaries
                             fstop = stop + flanking[1]
                             feature_seq = contig_seq[fstart:fstop]
                             if strand == '-': # negative strand
                                 feature_seq = reverse_complement(feature_seq)
-                            meta_key_vals = map(lambda x: x.split('='), meta.split(';'))
-                            metadata = {x[0]:x[1] for x in meta_key_vals}
-                            feature_id = metadata['ID']
+                            feature_id = __get_gff_attribute__(meta.rstrip(), 'ID')
                             
                             ''' Save to output file '''
-                            feature_seq = '\n'.join(feature_seq[i:i+70] for i in range(0, len(feature_seq), 70))
-                            f_noncoding.write('>' + feature_id + '\n')
-                            f_noncoding.write(feature_seq + '\n') 
+                            if not feature_id is None:
+                                feature_seq = '\n'.join([feature_seq[i:i+70] for i in range(0, len(feature_seq), 70)]) # list join avoids generator overhead
+                                f_noncoding.write('>' + feature_id + '\n' + feature_seq + '\n')
 
     
 def validate_gene_table(df_genes, df_alleles, log_group=1):
@@ -1248,8 +1203,9 @@ def validate_gene_table(df_genes, df_alleles, log_group=1):
     TODO: Update to handle LSDF tables
     
     Verifies that the gene x genome table is consistent with the
-    corresponding allele x genome table. Optimized to run column-by-column
-    rather than gene-by-gene for sparse tables.
+    corresponding allele x genome table. Alleles are collapsed to genes
+    with a single sparse matrix product, then compared to gene presence
+    all at once, so only inconsistent genomes are inspected individually.
     
     Parameters
     ----------
@@ -1263,21 +1219,37 @@ def validate_gene_table(df_genes, df_alleles, log_group=1):
     dfg = load_feature_table(df_genes)
     dfa = load_feature_table(df_alleles)
     print('Validating gene clusters...')
-    num_inconsistencies = 0
-    for g,genome in enumerate(df_genes.columns):
+    
+    ''' Map alleles and genes to shared gene rows, and align genomes to df_genes '''
+    allele_gene_codes, gene_labels = pd.factorize(dfa.index.map(__get_gene_from_allele__))
+    gene_labels = gene_labels.append(dfg.index.difference(gene_labels)) # genes without alleles
+    gene_rows = gene_labels.get_indexer(dfg.index)
+    genome_cols = [dfa.columns.get_loc(genome) for genome in dfg.columns]
+    
+    ''' Collapse alleles to genes with a (gene x allele) grouping matrix '''
+    n_genes = len(gene_labels); n_alleles = dfa.shape[0]
+    grouping = scipy.sparse.csr_matrix(
+        (np.ones(n_alleles, dtype='int32'), (allele_gene_codes, np.arange(n_alleles))),
+        shape=(n_genes, n_alleles))
+    sp_alleles = __get_presence_matrix__(dfa)[:,genome_cols]
+    has_gene = (grouping @ sp_alleles) > 0
+    
+    ''' Compare to gene presence, only inconsistent genomes are reported '''
+    sp_genes = __get_presence_matrix__(dfg).tocoo()
+    sp_genes = scipy.sparse.csc_matrix(
+        (sp_genes.data, (gene_rows[sp_genes.row], sp_genes.col)), shape=has_gene.shape) > 0
+    inconsistent = (has_gene != sp_genes).tocsc()
+    inconsistent_counts = np.diff(inconsistent.indptr)
+    for g,genome in enumerate(dfg.columns):
         if (g+1) % log_group == 0:
             print(g+1, 'Testing', genome)
-        genes = set(dfg[genome].dropna().index)
-        alleles = dfa[genome].dropna().index
-        allele_genes = set(alleles.map(__get_gene_from_allele__))
-        if genes != allele_genes:
-            inconsistencies = genes.symmetric_difference(allele_genes)
-            print('\tInconsistent:', inconsistencies)
-            num_inconsistencies += len(inconsistencies)
-    print('Gene Table Inconsistencies:', num_inconsistencies)
+        if inconsistent_counts[g] > 0:
+            genome_rows = inconsistent.indices[inconsistent.indptr[g]:inconsistent.indptr[g+1]]
+            print('\tInconsistent:', set(gene_labels[genome_rows]))
+    print('Gene Table Inconsistencies:', inconsistent.nnz)
 
 
-def validate_gene_table_dense(df_genes, df_alleles):
+def validate_gene_table_dense(df_genes, df_alleles, verbose=False):
     '''
     TODO: Update to handle LSDF tables
     
@@ -1291,47 +1263,35 @@ def validate_gene_table_dense(df_genes, df_alleles):
         Either the gene x genome table, or path to the table
     df_alleles : pd.DataFrame or str
         Either the allele x genome table, or path to the table
+    verbose : bool
+        If True, prints the gene and allele-derived presence vectors 
+        of each inconsistent gene, otherwise only lists the inconsistent 
+        genes once at the end (default False)
     '''
     dfg = load_feature_table(df_genes)
     dfa = load_feature_table(df_alleles)
     print('Validating gene clusters...')
     
-    current_cluster = None; allele_data = []; 
-    clusters_tested = 0; inconsistencies = 0
-    for allele_row in dfa.fillna(0).itertuples(name=None):
-        cluster = __get_gene_from_allele__(allele_row[0])
-        if current_cluster is None: # initializing
-            current_cluster = cluster
-        elif current_cluster != cluster: # end of gene cluster
-            alleles_all = np.array(allele_data)
-            has_gene = alleles_all.sum(axis=0) > 0
-            is_consistent = np.array_equal(has_gene, dfg.loc[current_cluster,:].fillna(0).values)
-            clusters_tested += 1
-            if not is_consistent:
-                print('Inconsistent', cluster)
-                print(has_gene)
-                print(dfg.loc[current_cluster,:].fillna(0).values)
-                inconsistencies += 1
-            if clusters_tested % 1000 == 0:
-                print('\tTested', clusters_tested, 'clusters')
-            allele_data = []
-            current_cluster = cluster
-        allele_data.append(np.array(allele_row[1:]))
-    
-    ''' Process final line '''
-    alleles_all = np.array(allele_data) 
-    has_gene = alleles_all.sum(axis=0) > 0
-    is_consistent = np.array_equal(has_gene, dfg.loc[current_cluster,:].fillna(0).values)
-    if not is_consistent:
-        print('Inconsistent', cluster)
-        print(has_gene)
-        print(dfg.loc[current_cluster,:].fillna(0).values)
-        inconsistencies += 1
-    print('Gene Table Inconsistencies:', inconsistencies)
+    ''' Collapse alleles to genes, then compare gene presence genome-by-genome '''
+    allele_genes = dfa.index.map(__get_gene_from_allele__)
+    df_presence = pd.DataFrame(np.asarray(dfa.values) > 0, index=dfa.index, columns=dfa.columns) # NaN/0 absent
+    df_has_gene = df_presence.groupby(allele_genes.values, sort=False).any()
+    genes = df_has_gene.index
+    has_gene = np.asarray(df_has_gene.values, dtype=bool)
+    gene_data = np.asarray(dfg.reindex(genes).values) > 0
+    is_inconsistent = (has_gene != gene_data).any(axis=1)
+    if verbose: 
+        for i in np.where(is_inconsistent)[0]:
+            print('Inconsistent', genes[i])
+            print(has_gene[i,:])
+            print(gene_data[i,:])
+    elif is_inconsistent.any():
+        print('Inconsistent:', list(genes[is_inconsistent]))
+    print('Gene Table Inconsistencies:', is_inconsistent.sum())
     
 
 def validate_upstream_table(df_upstream, upstream_fna_paths, nr_upstream_fna,
-                            allele_names, log_group=1):
+                            allele_names, log_group=1, n_jobs=1):
     '''
     TODO: Update to handle LSDF tables
     
@@ -1352,15 +1312,17 @@ def validate_upstream_table(df_upstream, upstream_fna_paths, nr_upstream_fna,
         Path to allele names file generated by build_cds_pangenome()
     log_group : int
         Print message per this many genomes (default 1)
+    n_jobs : int
+        Number of genomes to scan in parallel (default 1)
     '''
     return validate_table_against_fasta(
         df_features=df_upstream, genome_fasta_paths=upstream_fna_paths, 
         features_fasta=nr_upstream_fna, allele_names=allele_names,
-        log_group=log_group)
+        log_group=log_group, n_jobs=n_jobs)
 
     
 def validate_downstream_table(df_downstream, downstream_fna_paths, nr_downstream_fna, 
-                              allele_names, log_group=1):
+                              allele_names, log_group=1, n_jobs=1):
     '''
     TODO: Update to handle LSDF tables
     
@@ -1381,15 +1343,17 @@ def validate_downstream_table(df_downstream, downstream_fna_paths, nr_downstream
         Path to allele names file generated by build_cds_pangenome()
     log_group : int
         Print message per this many genomes (default 1)
+    n_jobs : int
+        Number of genomes to scan in parallel (default 1)
     '''
     return validate_table_against_fasta(
         df_features=df_downstream, genome_fasta_paths=downstream_fna_paths, 
         features_fasta=nr_downstream_fna, allele_names=allele_names, 
-        log_group=log_group)
+        log_group=log_group, n_jobs=n_jobs)
     
     
 def validate_allele_table(df_alleles, genome_fasta_paths, 
-                          alleles_fasta, log_group=1):
+                          alleles_fasta, log_group=1, n_jobs=1):
     ''' 
     TODO: Update to handle LSDF tables
     
@@ -1409,15 +1373,17 @@ def validate_allele_table(df_alleles, genome_fasta_paths,
         Either 'cds' or 'noncoding' depending on feature (default 'cds')
     log_group : int
         Print message per this many genomes (default 1)
+    n_jobs : int
+        Number of genomes to scan in parallel (default 1)
     '''
     return validate_table_against_fasta(
         df_features=df_alleles, genome_fasta_paths=genome_fasta_paths, 
-        features_fasta=alleles_fasta, allele_names=None, log_group=log_group)
+        features_fasta=alleles_fasta, allele_names=None, log_group=log_group, n_jobs=n_jobs)
     
 
 def validate_table_against_fasta(df_features, genome_fasta_paths, 
                                  features_fasta, allele_names=None, 
-                                 log_group=1):
+                                 log_group=1, n_jobs=1):
     '''
     TODO: Update to handle LSDF tables
     
@@ -1442,6 +1408,8 @@ def validate_table_against_fasta(df_features, genome_fasta_paths,
         downstream sequence validation due to conserved UTRs (default None).
     log_group : int
         Print message per this many genomes (default 1)
+    n_jobs : int
+        Number of genomes to scan in parallel (default 1)
     '''
     dfa = load_feature_table(df_features)
     inconsistencies = 0 # number of genomes with table-genome inconsistencies
@@ -1449,7 +1417,7 @@ def validate_table_against_fasta(df_features, genome_fasta_paths,
     ''' Pre-load allele names if available '''
     if allele_names: 
         print('Loading feature names...')
-        feathash_to_allele = {}
+        feature_to_allele = {} # feature names are short, used as keys directly
         with open(allele_names, 'r') as f:
             for line in f:
                 data = line.strip().split('\t')
@@ -1462,80 +1430,44 @@ def validate_table_against_fasta(df_features, genome_fasta_paths,
                         but may possibly break compatibility with non-PATRIC files. '''
                     if feature.count('|') == 2:
                         feature = feature[:feature.rindex('|')]
-                    feature_hash = __hash_sequence__(feature)
-                    feathash_to_allele[feature_hash] = allele
+                    feature_to_allele[feature] = allele
 
     ''' Pre-load hashes for non-redundant protein sequences '''
     print('Loading non-redundant sequences...')
     seqhash_to_feature = {}
-    def load_sequence_entry(seq_blocks, header):
-        if len(seq_blocks) > 0:
-            seq = ''.join(seq_blocks)
-            seq = seq if (allele_names is None) else seq + trim_variant(header)
-            seqhash = __hash_sequence__(seq)
-            if seqhash in seqhash_to_feature:
-                print('COLLISION:' , header)
-            seqhash_to_feature[seqhash] = header
-
-    with open(features_fasta, 'r') as f_fasta:
-        header = ''; seq_blocks = []
-        for line in f_fasta:
-            if line[0] == '>': # new sequence encountered
-                load_sequence_entry(seq_blocks, header)
-                header = line[1:].strip()
-                seq_blocks = []
-            else: # sequence encountered
-                seq_blocks.append(line.strip())
-        load_sequence_entry(seq_blocks, header) # process last record
+    for header, seq in __iter_fasta_records__(features_fasta): # only headers are decoded
+        header = header.decode('utf-8')
+        seq = seq if (allele_names is None) else seq + trim_variant(header).encode('utf-8')
+        seqhash = __hash_sequence__(seq)
+        if seqhash in seqhash_to_feature:
+            print('COLLISION:' , header)
+        seqhash_to_feature[seqhash] = header
     print('Non-redundant sequences:', len(seqhash_to_feature))
 
     ''' Validate individual genomes against table '''
-    
-    def check_genome_sequence(seq_blocks, genome_features, feature_name, num_missing):
-        if len(seq_blocks) > 0:
-            seq = ''.join(seq_blocks)
-            if not (allele_names is None):
-                ''' Also validating allele name '''
-                feature_name = feature_name.split('_upstream(')[0]
-                feature_name = feature_name.split('_downstream(')[0]
-                feature_hash = __hash_sequence__(feature_name)
-                if feature_hash in feathash_to_allele:
-                    seq += trim_variant(feathash_to_allele[feature_hash])
-            seqhash = __hash_sequence__(seq)
-            if seqhash in seqhash_to_feature:
-                ''' Note: Sequence hashes may be missing if any original
-                    sequences were excluded intentionally, i.e. too short '''
-                feature = seqhash_to_feature[seqhash] # original name to NR name
-                genome_features.add(feature)
-            else:
-                num_missing += 1
-        return genome_features
-    
     missing_features = 0
-    feature_counts = dfa.sum() # genome x total features
-    for i, genome_fasta in enumerate(sorted(genome_fasta_paths)):
+    presence = __get_presence_matrix__(dfa) # sparse feature x genome presence, computed once
+    genome_positions = {genome:j for j,genome in enumerate(dfa.columns)}
+    genome_fasta_paths = sorted(genome_fasta_paths)
+    lookups = (seqhash_to_feature, None if allele_names is None else feature_to_allele)
+    if n_jobs > 1: # scan genomes in parallel, lookups sent once per worker, collected in order
+        with mp.Pool(processes=n_jobs, initializer=__init_validation_worker__, initargs=lookups) as p:
+            genome_scans = p.map(__load_validation_features_worker__, genome_fasta_paths)
+    else: # single job, scan genomes lazily
+        genome_scans = map(functools.partial(__load_validation_features__, 
+            seqhash_to_feature=lookups[0], feature_to_allele=lookups[1]), genome_fasta_paths)
+    for i, (genome_fasta, genome_scan) in enumerate(zip(genome_fasta_paths, genome_scans)):
         if (i+1) % log_group == 0:
             print('Validating genome', i+1, ':', genome_fasta)
-        ''' Load all features present in the genome '''
-        genome_features = set()
-        with open(genome_fasta, 'r') as f_fasta:
-            feature_header = ''; seq_blocks = []
-            for line in f_fasta:
-                if line[0] == '>': # new sequence encountered
-                    genome_features = check_genome_sequence(seq_blocks, genome_features, feature_header, missing_features)
-                    feature_header = line[1:].strip()
-                    seq_blocks = []
-                else: # sequence encountered
-                    seq_blocks.append(line.strip())
-            genome_features = check_genome_sequence(seq_blocks, genome_features, feature_header, missing_features) 
-            # process last record
+        genome_features, genome_missing = genome_scan # all features present in the genome
+        missing_features += genome_missing
             
         ''' Check that identified features are consistent with the table '''
         genome = __get_genome_from_filename__(genome_fasta) # trim off full path and .fna/.faa
-        if not genome in dfa.columns: # possible footer
+        if not genome in genome_positions: # possible footer
             genome = '_'.join(genome.split('_')[:-1])
-        df_ga = dfa.loc[:,genome]
-        table_features = set(df_ga.index[df_ga == 1]) # features from df_features
+        j = genome_positions[genome]
+        table_features = set(dfa.index[presence.indices[presence.indptr[j]:presence.indptr[j+1]]]) # features from df_features
         test = table_features == genome_features # features from original fasta
         inconsistencies += (1 - int(test))
         if not test:
@@ -1547,30 +1479,30 @@ def validate_table_against_fasta(df_features, genome_fasta_paths,
 
 
 def validate_upstream_table_direct(df_upstream, genome_fna_paths, nr_upstream_fna,
-                                  limits=(-50,3), log_group=1):
+                                  limits=(-50,3), log_group=1, n_jobs=1):
     '''
     Does a partial validation of the upstream x genome table by checking that
     the recorded upstream sequences are present in the corresponding genome, 
     and counts start codons observed. DOES NOT check the exact location of the
-    upstream sequences. See validate_proximal_table() for parameters.
+    upstream sequences. See validate_proximal_table_direct() for parameters.
     '''
-    validate_proximal_table(df_upstream, genome_fna_paths, nr_upstream_fna, 
-                            limits, 'upstream', log_group)
+    validate_proximal_table_direct(df_upstream, genome_fna_paths, nr_upstream_fna, 
+                                   limits, 'upstream', log_group, n_jobs)
 
     
 def validate_downstream_table_direct(df_downstream, genome_fna_paths, nr_downstream_fna,
-                              limits=(-3,50), log_group=1):
+                              limits=(-3,50), log_group=1, n_jobs=1):
     '''
     Does a partial validation of the downstream x genome table by checking that
     the recorded downstream downstream are present in the corresponding genome, 
     and counts stop codons observed. DOES NOT check the exact location of the
-    downstream sequences. See validate_proximal_table() for parameters.
+    downstream sequences. See validate_proximal_table_direct() for parameters.
     '''
-    validate_proximal_table(df_downstream, genome_fna_paths, nr_downstream_fna, 
-                            limits, 'downstream', log_group)
+    validate_proximal_table_direct(df_downstream, genome_fna_paths, nr_downstream_fna, 
+                                   limits, 'downstream', log_group, n_jobs)
     
 
-def validate_proximal_table_direct(df_prox, genome_fna_paths, nr_prox_fna, limits, side, log_group=1):
+def validate_proximal_table_direct(df_prox, genome_fna_paths, nr_prox_fna, limits, side, log_group=1, n_jobs=1):
     '''
     TODO: Update to handle LSDF tables
     
@@ -1594,6 +1526,8 @@ def validate_proximal_table_direct(df_prox, genome_fna_paths, nr_prox_fna, limit
         Either "upstream" or "downstream"
     log_group : int
         Print message per this many genomes 
+    n_jobs : int
+        Number of genomes to scan in parallel (default 1)
     '''
     dfp = load_feature_table(df_prox)
     
@@ -1601,32 +1535,30 @@ def validate_proximal_table_direct(df_prox, genome_fna_paths, nr_prox_fna, limit
     print('Loading', side, 'sequences...')
     nr_prox = load_sequences_from_fasta(nr_prox_fna)
             
-    ''' Verify present of each proximal sequence within each genome '''
+    ''' Identify the proximal sequences expected in each genome '''
     window = limits[1] - limits[0]
-    for g, genome_fna in enumerate(genome_fna_paths):
-        genome_contigs = load_sequences_from_fasta(genome_fna)
+    scan_jobs = [] # arguments for __scan_proximal_sequences__(), per genome
+    for genome_fna in genome_fna_paths:
         genome = __get_genome_from_filename__(genome_fna)
-        if (g+1) % log_group == 0:
-            print(g+1, 'Evaluating', genome, genome_fna)
         dfp_strain = dfp.loc[:,genome]
         table_prox = dfp_strain.index[pd.notnull(dfp_strain)] # proximal sequences as defined by the table
         table_prox_seqs = {nr_prox[x]:x for x in table_prox} # maps sequences to names
+        scan_jobs.append((genome_fna, table_prox_seqs, window))
         
-        ''' Scan all contigs for detected fixed-length proximal sequences '''
-        for contig in genome_contigs.values():
-            for i in range(len(contig)):
-                segment = contig[i:i+window]
-                if segment in table_prox_seqs: 
-                    table_prox_seqs.pop(segment)
-            rc_contig = reverse_complement(contig)
-            for i in range(len(rc_contig)):
-                segment = rc_contig[i:i+window]
-                if segment in table_prox_seqs: 
-                    table_prox_seqs.pop(segment)
+    ''' Verify present of each proximal sequence within each genome '''
+    if n_jobs > 1: # scan genomes in parallel, collected in order
+        with mp.Pool(processes=n_jobs) as p:
+            genome_scans = p.starmap(__scan_proximal_sequences__, scan_jobs)
+    else: # single job, scan genomes lazily
+        genome_scans = itertools.starmap(__scan_proximal_sequences__, scan_jobs)
+    for g, (genome_fna, missing_prox) in enumerate(zip(genome_fna_paths, genome_scans)):
+        genome = __get_genome_from_filename__(genome_fna)
+        if (g+1) % log_group == 0:
+            print(g+1, 'Evaluating', genome, genome_fna)
                     
         ''' Report undetected proximal sequences '''
-        for prox in table_prox_seqs:
-            print('\tMissing', table_prox_seqs[prox], 'from', genome)
+        for prox in missing_prox:
+            print('\tMissing', prox, 'from', genome)
         
     ''' Count start/stop codons among non-redundant proximal sequences '''
     if limits[1] >= 3 and side == 'upstream':
@@ -1714,7 +1646,7 @@ def extract_annotations(genome_gffs, allele_name_file, annotations_out,
     allele_name_file : str
         Path to file with allele-protein ID map, usually <org>_allele_names.tsv
     annotations_out : str
-        Path to output annotations. Will also create a .tmp intermediate.
+        Path to output annotations
     batch : int
         Maximum GFF files to load into at once
     collapse_alleles : bool
@@ -1732,9 +1664,9 @@ def extract_annotations(genome_gffs, allele_name_file, annotations_out,
         types are extracted (default None)
     '''
     
-    ''' Copy allele name table '''
-    tmp_out = annotations_out + '.tmp'
-    shutil.copyfile(allele_name_file, tmp_out)
+    ''' Load allele name table, updated in memory by each batch '''
+    with open(allele_name_file, 'r') as f_names:
+        allele_rows = [line.strip().split('\t') for line in f_names]
     
     ''' Iteratively replace protein IDs with annotations from GFFs (in batches) '''
     n_gffs = len(genome_gffs)
@@ -1742,20 +1674,21 @@ def extract_annotations(genome_gffs, allele_name_file, annotations_out,
         ''' Load annotations for batch of GFFs '''
         annotations = {}
         for gff in genome_gffs[g:g+batch]:
-            with open(gff,'r') as f_gff:
+            with open(gff,'r', buffering=1<<20) as f_gff:
                 for line in f_gff:
+                    if line[:1] == '#' or not 'product=' in line: # skip comments and unannotated lines before splitting
+                        continue
                     data = line.strip().split('\t')
                     if len(data) == 9: 
                         feature_type = data[2]
                         if allowed_features is None or feature_type in allowed_features:
-                            line_annots = data[-1].split(';')
-                            line_annots = dict(map(lambda x: x.split('='), line_annots))
-                            if 'ID' in line_annots and 'product' in line_annots:
-                                product = line_annots['product']
-                                product = urllib.unquote(product) # replace % hex characters
-                                fid2 = line_annots['ID']; fid3 = None
-                                if 'locus_tag' in line_annots:
-                                    fid3 = fid2 + '|' + line_annots['locus_tag']
+                            fid2 = __get_gff_attribute__(data[-1], 'ID')
+                            product = __get_gff_attribute__(data[-1], 'product')
+                            if not (fid2 is None or product is None):
+                                product = urllib.parse.unquote(product) # replace % hex characters
+                                locus_tag = __get_gff_attribute__(data[-1], 'locus_tag'); fid3 = None
+                                if not locus_tag is None:
+                                    fid3 = fid2 + '|' + locus_tag
                                 if flexible_locus_tag: # save both names when possible
                                     annotations[fid2] = product
                                     if not fid3 is None:
@@ -1766,47 +1699,26 @@ def extract_annotations(genome_gffs, allele_name_file, annotations_out,
         print('Loaded', len(annotations), 'annotations from batch', g+1, '-', min(n_gffs,g+batch))
         
         ''' Incorporate newly loaded annotations '''
-        with open(tmp_out, 'r') as f_last:
-            with open(tmp_out+'2', 'w+') as f_next:
-                for line in f_last:
-                    data = line.strip().split('\t')
-                    allele = data[0]; fids = data[1:]
-                    fids = map(lambda x: annotations[x] if x in annotations else x, fids)
-                    fids = list(collections.OrderedDict.fromkeys(fids)) # remove duplicate annotations
-                    output = allele + '\t' + '\t'.join(fids)
-                    f_next.write(output + '\n')
-        shutil.move(tmp_out+'2', tmp_out) # remove last round
+        for data in allele_rows:
+            fids = map(lambda x: annotations[x] if x in annotations else x, data[1:])
+            data[1:] = dict.fromkeys(fids) # remove duplicate annotations, keeping order
 
     ''' Optionally collapse allele-level annotations to gene-level '''
     if collapse_alleles:
-        with open(tmp_out, 'r') as f_last:
-            current_cluster = None
-            with open(annotations_out, 'w+') as f_next:
-                for line in f_last:
-                    data = line.strip().split('\t')
-                    allele = data[0]
-                    cluster =  __get_gene_from_allele__(allele)
-                    allele_annots = '\t'.join(data[1:])
-                    if current_cluster is None: # initialize first cluster
-                        current_cluster = cluster
-                        cluster_alleles = [allele]
-                        cluster_annots = [allele_annots]
-                    elif cluster == current_cluster: # continuing current cluster
-                        cluster_alleles.append(allele)
-                        cluster_annots.append(allele_annots)
-                    else: # start of new cluster
-                        most_common_annot, count = collections.Counter(cluster_annots).most_common(1)[0]
-                        f_next.write(current_cluster + '\t' + most_common_annot + '\n')
-                        for i, annots in enumerate(cluster_annots):
-                            if annots != most_common_annot:
-                                f_next.write(cluster_alleles[i] + '\t' + annots + '\n')
-                        # Initialize next cluster
-                        current_cluster = cluster
-                        cluster_alleles = [allele]
-                        cluster_annots = [allele_annots]
-        os.remove(tmp_out)
+        allele_records = ((data[0], '\t'.join(data[1:])) for data in allele_rows) # (allele, annotations)
+        with open(annotations_out, 'w+', buffering=1<<20) as f_next:
+            for cluster, cluster_records in itertools.groupby(allele_records, 
+                key=lambda record: __get_gene_from_allele__(record[0])): # consecutive alleles per cluster
+                cluster_records = list(cluster_records)
+                cluster_annots = [annots for allele, annots in cluster_records]
+                most_common_annot, count = collections.Counter(cluster_annots).most_common(1)[0]
+                cluster_lines = [cluster + '\t' + most_common_annot + '\n']
+                cluster_lines += [allele + '\t' + annots + '\n' for allele, annots in cluster_records 
+                                  if annots != most_common_annot] # alleles with non-plurality annotations
+                f_next.writelines(cluster_lines) # one call per cluster
     else: 
-        shutil.move(tmp_out, annotations_out)
+        with open(annotations_out, 'w+', buffering=1<<20) as f_next:
+            f_next.writelines(data[0] + '\t' + '\t'.join(data[1:]) + '\n' for data in allele_rows)
         
 
 def extract_dominant_alleles(allele_table, allele_faa_file, dominant_out):
@@ -1831,10 +1743,6 @@ def extract_dominant_alleles(allele_table, allele_faa_file, dominant_out):
         DataFrame with columns for gene, dominant allele,
         total gene count, and dominant allele count
     '''
-    def allele_to_gene(allele):
-        terms = breakdown_feature_name(allele)
-        return terms[0] + '_' + terms[1] + str(terms[2])
-    
     ''' Setting up allele table '''
     print('Setting up allele table...')
     if type(allele_table) == str:
@@ -1844,40 +1752,27 @@ def extract_dominant_alleles(allele_table, allele_faa_file, dominant_out):
     
     ''' Identifying dominant alleles '''
     print('Identifying dominant alleles...')
-    df_counts = pd.DataFrame(df_alleles.fillna(0).sum(axis=1), columns=['count'])
-    df_counts['gene'] = df_counts.index.map(allele_to_gene)
-    dominant_alleles = [] # (gene, allele) pairs
-    current_gene = ''; current_allele = ''; 
-    current_counts = [0,0] # gene count, allele count
-    for row in df_counts.itertuples(name=None):
-        allele, count, gene = row
-        if gene != current_gene: # new gene encountered
-            if current_counts[0] > 0:
-                dominant_alleles.append(
-                    (current_gene, current_allele, current_counts[0], current_counts[1]))
-            current_gene = gene; current_allele = allele; current_counts = [count, count]
-        else: # continuing gene
-            if count > current_counts[1]: # more common allele encountered
-                current_allele = allele; current_counts[1] = count
-            current_counts[0] += count
-    if current_counts[0] > 0: # last entry
-        dominant_alleles.append(
-            (current_gene, current_allele, current_counts[0], current_counts[1]))
+    allele_counts = df_alleles.fillna(0).sum(axis=1)
+    allele_counts = pd.Series(np.asarray(allele_counts), index=allele_counts.index) # dense, for groupby reductions
+    allele_genes = allele_counts.index.map(__get_gene_from_allele__)
+    gene_groups = allele_counts.groupby(allele_genes.values, sort=False) # genes in order of appearance
+    df_dominant = pd.DataFrame({'dominant_allele': gene_groups.idxmax(), # first allele with max count
+                                'gene_count': gene_groups.sum()})
+    df_dominant['allele_count'] = allele_counts.loc[df_dominant.dominant_allele.values].values
+    df_dominant = df_dominant[df_dominant.gene_count > 0] # drop genes absent from all genomes
+    df_dominant.index.name = 'gene'
     
     ''' Formatting dominant allele output '''
-    df_dominant = pd.DataFrame(dominant_alleles, 
-        columns=['gene', 'dominant_allele', 'gene_count', 'allele_count'])
-    df_dominant = df_dominant.set_index('gene')
-    dominant_alleles = set(df_dominant.dominant_allele.values)
+    dominant_alleles = set(map(str.encode, df_dominant.dominant_allele.values))
     print('Found dominant alleles', df_dominant.shape, len(dominant_alleles))
     
     ''' Extracting dominant allele sequences '''
     print('Exportint dominant alleles...', end=' ')
-    alleles_written = 0
-    with open(allele_faa_file, 'r') as f_allele:
-        with open(dominant_out, 'w+') as f_dom:
+    alleles_written = 0; write_seq = False
+    with open(allele_faa_file, 'rb', buffering=1<<20) as f_allele: # raw bytes, no decoding
+        with open(dominant_out, 'wb', buffering=1<<20) as f_dom:
             for line in f_allele:
-                if line[0] == '>': # header line
+                if line[:1] == b'>': # header line
                     if line[1:].strip() in dominant_alleles: # header for dominant allele
                         f_dom.write(line); write_seq = True
                         alleles_written += 1
@@ -1897,18 +1792,20 @@ def load_sequences_from_fasta(fasta, header_fxn=None, seq_fxn=None, filter_fxn=N
         and removes line breaks from sequences. '''
     header_to_seq = {}
     with open(fasta, 'r') as f:
-        header = ''; seq = ''
+        header = ''; seq_blocks = [] # join lines once per record, not per line
         for line in f:
-            if line[0] == '>': # header line
+            if line[:1] == '>': # header line
+                seq = ''.join(seq_blocks)
                 if len(header) > 0 and len(seq) > 0:
                     if filter_fxn is None or filter_fxn(header):
                         seq = seq_fxn(seq) if seq_fxn else seq
                         header_to_seq[header] = seq
                 header = line.strip()[1:]
                 header = header_fxn(header) if header_fxn else header
-                seq = ''
+                seq_blocks = []
             else: # sequence line
-                seq += line.strip()
+                seq_blocks.append(line.strip())
+        seq = ''.join(seq_blocks)
         if len(header) > 0 and len(seq) > 0:
             if filter_fxn is None or filter_fxn(header):
                 seq = seq_fxn(seq) if seq_fxn else seq
@@ -1916,17 +1813,26 @@ def load_sequences_from_fasta(fasta, header_fxn=None, seq_fxn=None, filter_fxn=N
     return header_to_seq
 
 
-def load_feature_table(feature_table):
+def load_feature_table(feature_table, cache=False):
     ''' 
     TODO: Update to handle LSDF tables
     
     Loads DataFrames from CSV, CSV.GZ, PICKLE, or PICKLE.GZ.
     Uses index_col=0 for CSVs. Returns feature_table if provided 
-    with anything other than a string.
+    with anything other than a string. If cache is True, CSVs are
+    also saved as <feature_table>.pickle after parsing, and later 
+    loads read the pickle instead while it is newer than the CSV.
     '''
     if type(feature_table) == str: # path provided
         if feature_table[-4:].lower() == '.csv' or feature_table[-7:].lower() == '.csv.gz':
-            return pd.read_csv(feature_table, index_col=0)
+            cache_pickle = feature_table + '.pickle'
+            if cache and os.path.exists(cache_pickle) and \
+                os.path.getmtime(cache_pickle) >= os.path.getmtime(feature_table):
+                return pd.read_pickle(cache_pickle)
+            df = pd.read_csv(feature_table, index_col=0)
+            if cache: # binary copy skips CSV parsing next time
+                df.to_pickle(cache_pickle)
+            return df
         elif feature_table[-7:].lower() == '.pickle' or feature_table[-10:].lower() == '.pickle.gz':
             return pd.read_pickle(feature_table)
         else:
@@ -1936,9 +1842,11 @@ def load_feature_table(feature_table):
     
     
 def reverse_complement(seq):
-    ''' Returns the reverse complement of a DNA sequence.
+    ''' Returns the reverse complement of a DNA sequence (str or bytes).
         Supports lower/uppercase and ambiguous bases'''
-    return ''.join([DNA_COMPLEMENT[base] for base in list(seq)])[::-1]
+    if isinstance(seq, bytes):
+        return seq.translate(DNA_COMPLEMENT_BYTES_TABLE)[::-1]
+    return seq.translate(DNA_COMPLEMENT_TABLE)[::-1]
 
 
 def create_feature_name(name, cluster_type, cluster_num, variant_type=None, variant_num=-1):
@@ -1960,12 +1868,9 @@ def create_feature_name(name, cluster_type, cluster_num, variant_type=None, vari
     variant_num : int or str
         ID of variant. If negative, assumes feature refers to whole cluster (default -1)
     '''
-    short_name = name + '_'
-    cluster_name_short = CLUSTER_TYPES[cluster_type]
-    short_name += cluster_name_short + str(cluster_num)
+    short_name = f'{name}_{CLUSTER_TYPES[cluster_type]}{cluster_num}'
     if (not variant_type is None) and (int(variant_num) >= 0):
-        variant_type_short = VARIANT_TYPES[variant_type]
-        short_name += variant_type_short + str(variant_num)
+        return f'{short_name}{VARIANT_TYPES[variant_type]}{variant_num}'
     return short_name
 
 
@@ -1974,21 +1879,19 @@ def breakdown_feature_name(feature_name):
     Separates a feature name into the name, cluster-type, 
     cluster-number, variant-type, and variant-number.
     Example 1: EsC_A123U56 -> ['EsC', 'A', 123, 'U', 56]
-    Example 2: PsA_T789 -> ['PsA', 'T', 89, None, None]
+    Example 2: PsA_T789 -> ['PsA', 'T', 789, None, None]
     '''
-    data = feature_name.split('_')
-    name = '_'.join(data[:-1]); footer = data[-1]
-    cluster_type = footer[0]
-    for i in range(1,len(footer)): # identify variant type
-        if footer[i] in VARIANT_TYPES_REV:
-            variant_type = footer[i]
-            cluster_num = int(footer[1:i])
-            variant_num = int(footer[i+1:])
-            return name, cluster_type, cluster_num, variant_type, variant_num
-    cluster_num = int(footer[1:])
-    return name, cluster_type, cluster_num, None, None
+    match = FEATURE_NAME_PATTERN.match(feature_name)
+    if match is None:
+        raise ValueError('Unrecognized feature name: ' + feature_name)
+    name, cluster_type, cluster_num, variant_type, variant_num = match.groups()
+    name = '' if name is None else name
+    if variant_type is None: # cluster-level feature
+        return name, cluster_type, int(cluster_num), None, None
+    return name, cluster_type, int(cluster_num), variant_type, int(variant_num)
 
 
+@functools.lru_cache(maxsize=None)
 def trim_variant(feature_name):
     ''' Removes allele/upstream/downstream variant label
         to yield a cluster-level feature name. Trims off
@@ -2001,69 +1904,241 @@ def trim_variant(feature_name):
     return feature_name
 
 
-def __create_sparse_data_frame__(sparse_array, index, columns):
-    ''' 
-    Creates a SparseDataFrame from a scipy.sparse matrix by initializing 
-    individual columns as SparseSeries, then concatenating them. 
-    Sometimes faster than native SparseDataFrame initialization? Known issues: 
-    
-    - Direct initialization is slow in v0.24.2, see https://github.com/pandas-dev/pandas/issues/16773
-    - Empty SparseDataFrame initialization time scales quadratically with number of columns
-    - Initializing as dense and converting sparse uses more memory than directly making sparse
-    '''
-    n_row, n_col = sparse_array.shape
-    X = sparse_array.T if n_row < n_col else sparse_array # make n_col < n_row
-    sparse_cols = []
-    for i in range(X.shape[1]): # create columns individually
-        sparse_col = pd.SparseSeries.from_coo(scipy.sparse.coo_matrix(X[:,i]), dense_index=True)
-        sparse_cols.append(sparse_col)
-    df = pd.concat(sparse_cols, axis=1)
-    df = df.T if n_row < n_col else df # transpose back if n_col > n_row originally
-    df.index = pd.Index(index)
-    df.columns = pd.Index(columns)
-    return df
-
+def __get_presence_matrix__(df):
+    ''' Converts a feature x genome DataFrame to a scipy.sparse CSC matrix 
+        with 1 wherever a feature is present (value > 0, so both NaN and 0
+        are absent). Reads SparseArray columns directly without densifying them. '''
+    if all(isinstance(dtype, pd.SparseDtype) for dtype in df.dtypes):
+        sp_presence = pangenomix.sparse_utils.sparse_arrays_to_spmatrix(df)
+        sp_presence.data = (sp_presence.data > 0).astype('int32')
+        sp_presence = sp_presence.tocsc()
+        sp_presence.eliminate_zeros()
+        return sp_presence
+    return scipy.sparse.csc_matrix((np.asarray(df.values) > 0).astype('int32'))
 
 def __load_feature_to_allele__(allele_names):
     ''' Loads feature-to-allele mapping from file, usually <name>_allele_names.tsv. '''
-    map_feature_to_gffid = lambda x: '|'.join(x.split('|')[:2])
-    feat_to_allele = {}
     with open(allele_names, 'r') as f_all:
-        for line in f_all:
-            data = line.strip().split('\t')
-            allele = data[0]; synonyms = data[1:]
-            for synonym in synonyms:
-                gff_synonym = map_feature_to_gffid(synonym)
-                feat_to_allele[gff_synonym] = allele
-    return feat_to_allele
+        rows = [line.strip().split('\t') for line in f_all]
+    
+    ''' Keeps up to the second "|", i.e. fig|<genome>.peg.#|<locus> to fig|<genome>.peg.# '''
+    return {'|'.join(synonym.split('|', 2)[:2]): data[0]
+            for data in rows for synonym in data[1:]}
                           
+def __load_clstr_header_to_allele__(clstr_file, name, cluster_type):
+    ''' Maps representative headers in a CD-Hit CLSTR file to allele
+        names <name>_C#A# or <name>_T#A#, in CLSTR order. '''
+    header_to_allele = {}
+    with open(clstr_file, 'r') as f_clstr:
+        for line in f_clstr:
+            if line[:1] == '>': # starting new gene cluster
+                cluster_num = line.split()[-1].strip() # cluster number as string
+            elif len(line.strip()) > 0: # adding allele to cluster
+                data = line.split()
+                allele_num = data[0] # allele number as string
+                allele_header = data[2][1:-3] # old allele header
+                header_to_allele[allele_header] = create_feature_name(
+                    name, cluster_type, cluster_num, 'allele', allele_num)
+    return header_to_allele
+
+@functools.lru_cache(maxsize=None)
 def __get_gene_from_allele__(allele):
     ''' Converts <name>_C#A# or <name>_T#A# allele to 
         <name>_C# gene or <name>_T# transcript. '''
-    splitter = VARIANT_TYPES['allele']
-    return splitter.join(allele.split(splitter)[:-1])
+    return allele.rpartition(VARIANT_TYPES['allele'])[0]
 
 def __get_genome_from_filename__(filepath):
     ''' Extracts genome from a filepath by removing the full 
         path and the extension '''
     # return filepath.split('/')[-1][:-4] # old version
-    filename = os.path.split(filepath)[1] # remove full path
+    filename = os.path.basename(filepath) # remove full path
     return os.path.splitext(filename)[0] # remove extension
 
 def __get_header_from_fasta_line__(line):
-    ''' Extracts a short header from a full header line in a fasta'''
+    ''' Extracts a short header from a full header line in a fasta,
+        works for both str and bytes lines '''
     return line.split()[0][1:].strip()
 
-def __hash_sequence__(seq):
-    ''' Hashes arbitary length strings/sequences to bytestrings '''
-    return hashlib.sha256(seq.encode('utf-8')).digest()
+def __get_gff_attribute__(attr_raw, key):
+    ''' Extracts the value of a single key from a GFF attribute string
+        ("k1=v1;k2=v2;..."), without splitting the other attributes.
+        Returns None if the key is not present. '''
+    tag = key + '='
+    if attr_raw.startswith(tag):
+        value_start = len(tag)
+    else:
+        value_start = attr_raw.find(';' + tag)
+        if value_start == -1:
+            return None
+        value_start += len(tag) + 1
+    value_stop = attr_raw.find(';', value_start)
+    return attr_raw[value_start:] if value_stop == -1 else attr_raw[value_start:value_stop]
+
+def __hash_fasta_records__(genome_path):
+    ''' Hashes the sequences of all records in a fasta file, in order. 
+        Single job for consolidate_seqs(). Returns a list of (header, hash) 
+        for records with sequences, a list of headers without sequences, and 
+        a dict mapping each hash to its sequence lines as bytes (joined by 
+        newlines), only kept for the first record with that sequence in the 
+        file. Reads the file as bytes and only decodes headers. '''
+    records = []; missing_headers = []; seqs = {}
+    
+    def process_header_and_seq(header, seq_blocks):
+        ''' Records a header/sequence pair '''
+        seq = b''.join(seq_blocks)
+        if len(header) > 0 and len(seq) > 0: # valid header-sequence record
+            seqhash = __hash_sequence__(seq)
+            records.append((header, seqhash))
+            if not seqhash in seqs:
+                seqs[seqhash] = b'\n'.join(seq_blocks)
+        elif len(header) > 0 and len(seq) == 0: # header without sequence
+            missing_headers.append(header)
+    
+    with open(genome_path, 'rb') as f:
+        header = ''; seq_blocks = []
+        for line in f:
+            if line[:1] == b'>': # header encountered
+                process_header_and_seq(header, seq_blocks)
+                header = __get_header_from_fasta_line__(line).decode('utf-8')
+                seq_blocks = []
+            else: # sequence line encountered
+                seq_blocks.append(line.strip())
+        process_header_and_seq(header, seq_blocks) # process last record
+    return records, missing_headers, seqs
+
+def __load_validation_features__(genome_fasta, seqhash_to_feature, feature_to_allele=None):
+    ''' Identifies the non-redundant features present in a genome fasta by 
+        sequence hash. Single job for validate_table_against_fasta(). If 
+        feature_to_allele is provided, sequences are matched together with 
+        their allele variant (for upstream/downstream tables). Returns the set 
+        of features and the number of sequences without a match. '''
+    genome_features = set(); num_missing = 0
+    
+    for feature_header, seq in __iter_fasta_records__(genome_fasta):
+        if not (feature_to_allele is None):
+            ''' Also validating allele name '''
+            feature_name = feature_header.decode('utf-8')
+            feature_name = feature_name.split('_upstream(')[0]
+            feature_name = feature_name.split('_downstream(')[0]
+            if feature_name in feature_to_allele:
+                seq += trim_variant(feature_to_allele[feature_name]).encode('utf-8')
+        seqhash = __hash_sequence__(seq)
+        if seqhash in seqhash_to_feature:
+            ''' Note: Sequence hashes may be missing if any original
+                sequences were excluded intentionally, i.e. too short '''
+            genome_features.add(seqhash_to_feature[seqhash]) # original name to NR name
+        else:
+            num_missing += 1
+    return genome_features, num_missing
+
+def __init_validation_worker__(seqhash_to_feature, feature_to_allele):
+    ''' Pool initializer for validate_table_against_fasta(). Stores the
+        lookup tables once per worker process, rather than pickling 
+        them with every task. '''
+    VALIDATION_WORKER_LOOKUPS['seqhash_to_feature'] = seqhash_to_feature
+    VALIDATION_WORKER_LOOKUPS['feature_to_allele'] = feature_to_allele
+
+def __load_validation_features_worker__(genome_fasta):
+    ''' Parallel job for validate_table_against_fasta(), runs 
+        __load_validation_features__() with the worker's lookup tables. '''
+    return __load_validation_features__(genome_fasta, **VALIDATION_WORKER_LOOKUPS)
+
+def __iter_fasta_records__(fasta):
+    ''' Iterates over (header, sequence) records in a fasta file, read as 
+        bytes. Headers are the full header line without ">", sequence lines 
+        are stripped and joined. Records without sequences are skipped. '''
+    with open(fasta, 'rb', buffering=1<<20) as f_fasta:
+        header = None; seq_blocks = []
+        for line in f_fasta:
+            if line[:1] == b'>': # new header line encountered
+                seq = b''.join(seq_blocks)
+                if not (header is None) and len(seq) > 0:
+                    yield header, seq
+                header = line[1:].strip(); seq_blocks = []
+            else: # sequence line encountered
+                seq_blocks.append(line.strip())
+        seq = b''.join(seq_blocks)
+        if not (header is None) and len(seq) > 0: # process last record
+            yield header, seq
+
+def __scan_proximal_sequences__(genome_fna, table_prox_seqs, window):
+    ''' Scans both strands of all contigs in a genome for fixed-length 
+        proximal sequences, mapped from sequence to name. Single job for 
+        validate_proximal_table_direct(). Returns names of sequences that 
+        were not found, stopping early once all sequences are found. Slides 
+        a window over each strand, or searches each sequence directly with 
+        str.find once few sequences remain. '''
+    table_prox_seqs = dict(table_prox_seqs) # popped as sequences are found
+    if len(table_prox_seqs) == 0:
+        return []
+    genome_contigs = load_sequences_from_fasta(genome_fna)
+    for contig in genome_contigs.values():
+        for reverse in (False, True):
+            strand_seq = reverse_complement(contig) if reverse else contig # reverse strand only built if needed
+            if len(table_prox_seqs) <= 100: # few sequences left, C-level str.find per sequence is faster
+                for prox_seq in list(table_prox_seqs):
+                    if len(prox_seq) == window: # full-length sequence, may occur anywhere
+                        found = strand_seq.find(prox_seq) != -1
+                    else: # shorter sequence, only seen by the window scan at the contig tail
+                        found = len(prox_seq) < window and strand_seq.endswith(prox_seq)
+                    if found:
+                        table_prox_seqs.pop(prox_seq)
+            else: # slide window over strand
+                for i in range(len(strand_seq)):
+                    segment = strand_seq[i:i+window]
+                    if segment in table_prox_seqs: 
+                        table_prox_seqs.pop(segment)
+                        if len(table_prox_seqs) == 0:
+                            break
+            if len(table_prox_seqs) == 0: # all sequences found, skip remaining contigs
+                return []
+    return list(table_prox_seqs.values())
+
+def __load_headers_with_sequences__(genome_fasta):
+    ''' Lists headers in a fasta file that have non-empty sequences, 
+        in order. Single job for build_genetic_feature_tables(). '''
+    headers = []
+    with open(genome_fasta, 'rb') as f_fasta:
+        header = ''; has_seq = False # track the sequence to skip over empty sequences
+        for line in f_fasta:
+            if line[:1] == b'>': # new header line encountered
+                if has_seq:
+                    headers.append(header)
+                header = __get_header_from_fasta_line__(line).decode('utf-8')
+                has_seq = False
+            elif not has_seq: # sequence line encountered
+                has_seq = len(line.strip()) > 0
+        if has_seq: # process last entry
+            headers.append(header)
+    return headers
 
-def __stream_stdout__(command):
-    ''' Hopefully Jupyter-safe method for streaming process stdout '''
-    process = sp.Popen(command, stdout=sp.PIPE, shell=True)
+def __hash_sequence__(seq):
+    ''' Hashes arbitary length strings/sequences to bytestrings. Uses 
+        BLAKE2b with a 16-byte digest, which is sufficient for de-duplication
+        and faster than SHA-256. Accepts str or bytes. '''
+    if not isinstance(seq, bytes):
+        seq = seq.encode('utf-8')
+    return hashlib.blake2b(seq, digest_size=16).digest()
+
+def __stream_stdout__(args):
+    ''' Hopefully Jupyter-safe method for streaming process stdout. Runs
+        the command given as an argument list without a shell, and reads
+        stdout in blocks of whatever is available rather than per line. 
+        Raises subprocess.CalledProcessError if the command fails. '''
+    process = sp.Popen(args, stdout=sp.PIPE)
+    buffer = b''
     while True:
-        line = process.stdout.readline().decode('utf-8')
-        if not line:
+        block = process.stdout.read1(65536)
+        if not block:
             break
-        yield line.rstrip()
+        lines = (buffer + block).split(b'\n')
+        buffer = lines.pop() # incomplete last line
+        for line in lines:
+            yield line.decode('utf-8').rstrip()
+    if buffer:
+        yield buffer.decode('utf-8').rstrip()
+    process.stdout.close()
+    return_code = process.wait()
+    if return_code != 0:
+        raise sp.CalledProcessError(return_code, args)
     
\ No newline at end of file
@@ -8,7 +8,8 @@ Created on Thu Mar 19 18:55:10 2020
 Tools for downloading and validating data through PATRIC's FTP server.
 """
 
-import os, urllib
+import os, urllib.request
+from functools import reduce
 import pandas as pd
 
 VALID_PATRIC_FILES = ['faa','features.tab','ffn','frn','gff','pathway.tab',
@@ -50,14 +51,13 @@ def download_patric_genomes(genomes, output_dir, filetypes=['fna','faa','gff','s
             ftype_target = ftype.replace('PATRIC.','') # drop 'PATRIC' in output files
             source_target_filetypes.append( (ftype_source, ftype_target) )
         else: # invalid filetype
-            print 'Invalid filetype:', ftype
+            print('Invalid filetype:', ftype)
     
     ''' Download relevant files '''
     for i, genome in enumerate(genomes):
         ''' Set up source and target locations '''
         genome_source = 'ftp://ftp.patricbrc.org/genomes/' + genome + '/' + genome # base link to genome files
-        genome_dir = output_dir + '/' + genome + '/' # genome-specific output directory
-        genome_dir = genome_dir.replace('//','/')
+        genome_dir = os.path.join(output_dir, genome, '') # genome-specific output directory
         genome_target = genome_dir + genome # genome-specific output base filename
         if not os.path.exists(genome_dir):
             os.mkdir(genome_dir)
@@ -69,13 +69,13 @@ def download_patric_genomes(genomes, output_dir, filetypes=['fna','faa','gff','s
                 source = genome_source + '.' + source_filetype
                 target = genome_target + '.' + target_filetype
                 if os.path.exists(target) and not redownload:
-                    print i+1, 'Already exists:', target
+                    print(i+1, 'Already exists:', target)
                 else:
-                    print i+1, source, '->', target
-                    urllib.urlretrieve(source, target)
-                    urllib.urlcleanup()
+                    print(i+1, source, '->', target)
+                    urllib.request.urlretrieve(source, target)
+                    urllib.request.urlcleanup()
         except IOError: # genome ID not found
-            print 'Bad genome ID:', genome
+            print('Bad genome ID:', genome)
             os.rmdir(genome_dir)
             bad_genomes.append(genome)
     return bad_genomes
@@ -107,8 +107,7 @@ def validate_patric_genomes(genomes_dir, summary_file='data/PATRIC/PATRIC_genome
     
     ''' Evaluate consistency between summary and downloaded files '''
     for genome in os.listdir(genomes_dir):
-        genome_specific_dir = genomes_dir + '/' + genome + '/'
-        genome_specific_dir = genome_specific_dir.replace('//','/')
+        genome_specific_dir = os.path.join(genomes_dir, genome, '')
         gff_file = genome_specific_dir + genome + '.gff'
         fna_file = genome_specific_dir + genome + '.fna'
         faa_file = genome_specific_dir + genome + '.faa'
@@ -117,7 +116,7 @@ def validate_patric_genomes(genomes_dir, summary_file='data/PATRIC/PATRIC_genome
         files_present = reduce(lambda x,y: x and y, files_present)
         
         if files_present:
-            print 'Testing', genome, genome_specific_dir
+            print('Testing', genome, genome_specific_dir)
             patric_contigs = df_summary_full.loc[genome,'contigs']
             patric_cds = df_summary_full.loc[genome,'patric_cds']
         
@@ -125,7 +124,7 @@ def validate_patric_genomes(genomes_dir, summary_file='data/PATRIC/PATRIC_genome
             with open(gff_file, 'r') as f_gff:
                 gff_contigs = set(); gff_cds = set()
                 for line in f_gff:
-                    if line[0] != '#':
+                    if line[:1] != '#':
                         data = line.split('\t')
                         if len(data) > 3:
                             contig, src, ftype =  data[:3]
@@ -139,14 +138,14 @@ def validate_patric_genomes(genomes_dir, summary_file='data/PATRIC/PATRIC_genome
             with open(fna_file, 'r') as f_fna:
                 fna_contigs = 0
                 for line in f_fna:
-                    if line[0] == '>':
+                    if line[:1] == '>':
                         fna_contigs += 1
 
             ''' Checking FAA against GFF CDS '''
             with open(faa_file, 'r') as f_faa:
                 faa_cds = set()
                 for line in f_faa:
-                    if line[0] == '>':
+                    if line[:1] == '>':
                         fname = line.split()[0].split('|')[1]
                         faa_cds.add(fname)
 
@@ -158,13 +157,13 @@ def validate_patric_genomes(genomes_dir, summary_file='data/PATRIC/PATRIC_genome
             cds_check1 = len(faa_cds) == len(gff_cds)
             cds_check2 = cds_accuracy > 98.0
             spgene_check = df_spgene.shape[0] > 0
-            print '\tSpecial genes:', df_spgene.shape[0]
+            print('\tSpecial genes:', df_spgene.shape[0])
 
             if not(contig_check2 and cds_check1 and cds_check2):
-                print '\tFNA contig count match:', contig_check2, fna_contigs, patric_contigs
-                print '\tFAA/GFF CDS count match:', cds_check1, len(faa_cds), len(gff_cds)
+                print('\tFNA contig count match:', contig_check2, fna_contigs, patric_contigs)
+                print('\tFAA/GFF CDS count match:', cds_check1, len(faa_cds), len(gff_cds))
                 #print '\t', gff_cds.difference(faa_cds)
-                print '\tGFF CDS accuracy:', cds_check2, cds_accuracy
+                print('\tGFF CDS accuracy:', cds_check2, cds_accuracy)
                 
                 
                 
\ No newline at end of file
@@ -311,7 +311,7 @@ class LightSparseDataFrame():
                 f.write(index_val + '\n')
             for column_val in self.columns:
                 f.write(column_val + '\n')
-        scipy.sparse.save_npz(npz_file, self.data.tocoo())
+        scipy.sparse.save_npz(npz_file, self.data.tocsc()) # CSC is more compact than COO
 
         
     def to_sparse_arrays(self):